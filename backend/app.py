@@ -1,35 +1,103 @@
 # app.py (UltronFX Full API Pack)
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi import FastAPI, HTTPException, Request, Depends, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Optional
 import uvicorn
 import time
-import pandas as pd
-import datetime
+import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
 
 from inference import (
     load_model,
-    predict_7day,
-    predict_today,
     predict_bulk,
     predict_all,
-    get_history,
+    get_history_payload,
+    get_history_delta,
+    get_history_batch,
     get_risk_score,
     get_trending,
     compare_two,
     get_stats,
-    infer_coin_list_from_scalers
+    infer_coin_list_from_scalers,
+    load_history_store,
+    warm_up,
+    FEATURE_COLS,
+    FORECAST_CACHE
 )
+from config import (
+    MODEL_BACKEND, QUANTIZE, QUANT_MAX_ERROR, ENSEMBLE, MC_MAX_SAMPLES, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+    INFER_WORKERS, INFER_QUEUE, BATCHER_QUEUE, TORCH_THREADS, IO_WORKERS, RETRY_AFTER_SEC,
+    HISTORY_MAX_AGE, EXPORT_CHUNK_ROWS
+)
+from response_codec import (
+    JSON_TYPE, CSV_TYPE, NDJSON_TYPE, COLUMNAR_TYPES, STREAM_TYPES,
+    dumps_json, encode_columns, negotiate
+)
+from stream_export import array_chunks, encode_rows, frame_chunks, history_chunks
+from history_query import downsample, query_history, to_columns, to_records, to_table
+from history_store import COLUMNS as OHLCV_COLUMNS, date_bounds
+from executor import BoundedExecutor, Saturated, configure_torch_threads, torch_threads_per_worker
+from mc_dropout import predict_intervals, supports_intervals
+from ensemble import load_ensemble, predict_ensemble
+from scaler_registry import get_registry, start_registry_watcher
+from batcher import MicroBatcher
+from forecaster import Forecaster
+from feature_store import FeatureStore
+from window_codec import decode_windows, is_binary, UnsupportedMediaType, RAW_TYPES, NPY_TYPES
 from auth import router as auth_router
 
+@asynccontextmanager
+async def lifespan(app):
+    # Load, warm up and start background services before accepting traffic
+    global READY, EXECUTOR, IO_POOL
+    t0 = time.perf_counter()
+    load_serving_state()
+
+    # Pools and torch threads are per worker process, like the threads below
+    threads = configure_torch_threads(TORCH_THREADS or torch_threads_per_worker(INFER_WORKERS))
+    EXECUTOR = BoundedExecutor("inference", INFER_WORKERS, INFER_QUEUE, RETRY_AFTER_SEC)
+    IO_POOL = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="live-io")
+    STARTUP_METRICS["torch_threads"] = threads
+
+    t1 = time.perf_counter()
+    warm_up(MODEL, warmup_batch_sizes())
+    STARTUP_METRICS["warmup_ms"] = (time.perf_counter() - t1) * 1000
+
+    # Threads are started per worker process: with gunicorn --preload the
+    # module is imported once in the master and threads do not survive fork.
+    start_registry_watcher()
+    BATCHER.start()
+    FORECASTER.start()
+
+    STARTUP_METRICS["startup_ms"] = (time.perf_counter() - t0) * 1000
+    READY = True
+    print(f"Ready in {STARTUP_METRICS['startup_ms']:.0f} ms")
+    yield
+    READY = False
+    EXECUTOR.shutdown(wait=False)
+    IO_POOL.shutdown(wait=False)
+
+
 app = FastAPI(
     title="UltronFX Full API Pack",
     description="Crypto 7-Day Forecast API using TransformerV3",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan
 )
 
+@app.exception_handler(Saturated)
+async def saturated_handler(request, exc):
+    # Load shedding: fail fast instead of queueing past the latency budget
+    return JSONResponse({"detail": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(exc.retry_after)})
+
+
 # Include Auth Router
 app.include_router(auth_router, tags=["authentication"])
 
@@ -59,15 +127,64 @@ async def add_process_time_header(request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    # Keyed by route template so /predict/coin_X and unknown URLs add no keys
+    route = request.scope.get("route")
+    if route is not None:
+        FIRST_REQUEST_MS.setdefault(route.path, process_time * 1000)
     print(f"Request: {request.url.path} took {process_time:.4f}s")
     return response
 
 # ------------- Startup ------------------
 
-MODEL, COIN_TO_ID, ID_TO_COIN = load_model(device="cpu")
+MODEL = COIN_TO_ID = ID_TO_COIN = None
+BATCHER = FORECASTER = FEATURE_STORE = None
+EXECUTOR = IO_POOL = None
 COIN_LIST = sorted(infer_coin_list_from_scalers())
 START_TIME = time.time()
 
+READY = False
+STARTUP_METRICS = {}
+FIRST_REQUEST_MS = {}
+
+
+def load_serving_state():
+    """Load the model, scaler registry and history once per process."""
+    global MODEL, COIN_TO_ID, ID_TO_COIN, BATCHER, FORECASTER, FEATURE_STORE
+    if MODEL is not None:
+        # Already loaded, e.g. inherited from the gunicorn preload master
+        return
+
+    t = time.perf_counter()
+    get_registry()
+    STARTUP_METRICS["registry_ms"] = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    if ENSEMBLE:
+        MODEL, COIN_TO_ID, ID_TO_COIN = load_ensemble(device="cpu")
+    else:
+        MODEL, COIN_TO_ID, ID_TO_COIN = load_model(
+            device="cpu", backend=MODEL_BACKEND, quantize=QUANTIZE, max_quant_error=QUANT_MAX_ERROR
+        )
+    STARTUP_METRICS["model_load_ms"] = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    load_history_store()
+    STARTUP_METRICS["history_load_ms"] = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    FEATURE_STORE = FeatureStore(COIN_LIST)
+    FEATURE_STORE.refresh()
+    STARTUP_METRICS["feature_store_ms"] = (time.perf_counter() - t) * 1000
+
+    BATCHER = MicroBatcher(MODEL, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, device="cpu",
+                           max_queue=BATCHER_QUEUE, retry_after=RETRY_AFTER_SEC)
+    FORECASTER = Forecaster(MODEL, COIN_LIST, device="cpu", store=FEATURE_STORE)
+
+
+def warmup_batch_sizes():
+    """Batch sizes the API actually runs: single, micro-batched and all-coin."""
+    return sorted({1, BATCHER.max_batch_size, len(COIN_LIST)})
+
 
 # ------------- Models --------------------
 
@@ -88,6 +205,60 @@ class BulkRequest(BaseModel):
     windows: Dict[str, List[List[float]]]
 
 
+# Binary window bodies (see window_codec.py). JSON stays the default; raw
+# float32 or .npy bodies skip per-float JSON parsing and Pydantic validation,
+# and the coin(s) move to the query string.
+
+async def _read_body(request, model):
+    body = await request.body()
+    content_type = request.headers.get("content-type")
+    if not is_binary(content_type):
+        try:
+            return model.model_validate_json(body), None
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+    return None, body
+
+
+async def predict_body(request: Request, coin: Optional[str] = None) -> PredictRequest:
+    req, body = await _read_body(request, PredictRequest)
+    if req is not None:
+        return req
+    if not coin:
+        raise HTTPException(400, "Binary windows need the coin as a query parameter: ?coin=...")
+    try:
+        window = decode_windows(body, request.headers["content-type"], count=1)[0]
+    except UnsupportedMediaType as e:
+        raise HTTPException(415, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return PredictRequest.model_construct(coin=coin, window=window)
+
+
+async def bulk_body(request: Request, coins: Optional[str] = None) -> BulkRequest:
+    req, body = await _read_body(request, BulkRequest)
+    if req is not None:
+        return req
+    names = [c for c in (coins or "").split(",") if c]
+    if not names:
+        raise HTTPException(400, "Binary windows need the coins as a query parameter: ?coins=a,b,...")
+    try:
+        windows = decode_windows(body, request.headers["content-type"], count=len(names))
+    except UnsupportedMediaType as e:
+        raise HTTPException(415, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return BulkRequest.model_construct(coins=names, windows=dict(zip(names, windows)))
+
+
+def _window_body_doc(model):
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": model.model_json_schema()},
+        **{t: binary for t in RAW_TYPES[:1] + NPY_TYPES[:1]},
+    }}}
+
+
 # ------------- Endpoints ---------------------
 
 from live_data_service import live_service
@@ -95,6 +266,14 @@ from live_data_service import live_service
 # Global Data Mode: 'STATIC' or 'LIVE'
 DATA_MODE = "STATIC"
 
+class HistoryBatchRequest(BaseModel):
+    coins: Optional[List[str]] = None   # default: all coins
+    start: Optional[str] = None
+    end: Optional[str] = None
+    limit: Optional[int] = None
+    resolution: str = "daily"
+
+
 class ModeRequest(BaseModel):
     mode: str
 
@@ -155,81 +334,168 @@ def list_coins():
     return {"coins": COIN_LIST}
 
 
-@app.post("/predict")
-def predict(req: PredictRequest):
+# ------------- Execution -----------------
+# Model work never runs on Starlette's threadpool: single-coin forecasts go
+# through the micro-batcher, everything else through the bounded inference
+# pool, and blocking LIVE fetches through the I/O pool. A full queue raises
+# Saturated, answered with 503 + Retry-After.
+
+async def run_inference(fn, *args):
+    return await asyncio.wrap_future(EXECUTOR.submit(fn, *args))
+
+
+async def run_io(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(IO_POOL, fn, *args)
+
+
+async def batched_predict(coin, window):
+    return await asyncio.wrap_future(BATCHER.submit(coin, window))
+
+
+async def live_window(coin):
+    """Fresh 72-day feature window from Binance, or None to use the fallback."""
+    try:
+        # Last 72 days of features, updated incrementally per coin
+        df = await run_io(live_service.fetch_live_window, coin)
+        if not df.empty and len(df) == 72:
+            # Same rows as add_technical_indicators (bfill/fillna(0) applied)
+            print(f"LIVE PREDICTION: Using real-time data for {coin}")
+            return df
+        print(f"LIVE PREDICTION WARNING: Insufficient live data ({len(df)} rows). Using static fallback.")
+    except Exception as e:
+        print(f"LIVE PREDICTION ERROR: {e}. Using static fallback.")
+    return None
+
+
+@app.post("/predict", openapi_extra=_window_body_doc(PredictRequest))
+async def predict(req: PredictRequest = Depends(predict_body), intervals: Optional[int] = None):
+    """
+    7-day forecast. `intervals=K` adds Monte-Carlo dropout percentile bands
+    from K samples (capped at MC_MAX_SAMPLES), scored as one batch.
+    """
     if req.coin not in COIN_LIST:
         raise HTTPException(400, f"Unknown coin: {req.coin}")
-    
+    if intervals is not None:
+        if intervals < 2:
+            raise HTTPException(400, "intervals must be at least 2 samples")
+        if not supports_intervals(MODEL):
+            raise HTTPException(400, "Forecast intervals are only available with the eager fp32 model")
+
     window = req.window
-    
+
     # LIVE MODE LOGIC: Fetch fresh 72-day window
     if DATA_MODE == "LIVE":
-        try:
-            # Fetch last 72 days with all features computed
-            df = live_service.fetch_live_history(req.coin, days=72)
-            
-            if not df.empty and len(df) >= 72:
-                # Ensure columns are in the exact order expected by the model
-                feature_cols = [
-                    'open','high','low','close','volume','ema_10','ema_21','ma_7','ma_30',
-                    'momentum_rsi','volume_adi','volume_obv','volume_cmf','return_1','pct_change',
-                    'day_of_week','is_weekend'
-                ]
-                
-                # Select and convert to list of lists
-                # df[feature_cols] might have some NaNs if not fully filled, but add_technical_indicators handles bfill/fillna(0)
-                live_window = df[feature_cols].values.tolist()
-                
-                if len(live_window) == 72:
-                    print(f"LIVE PREDICTION: Using real-time data for {req.coin}")
-                    window = live_window
-                else:
-                    print(f"LIVE PREDICTION WARNING: Insufficient live data ({len(live_window)} rows). Using static fallback.")
-            else:
-                print(f"LIVE PREDICTION WARNING: Failed to fetch live data. Using static fallback.")
-                
-        except Exception as e:
-            print(f"LIVE PREDICTION ERROR: {e}. Using static fallback.")
-
-    preds = predict_7day(MODEL, req.coin, window)
+        df = await live_window(req.coin)
+        if df is not None:
+            window = df[FEATURE_COLS].values.tolist()
+
+    if ENSEMBLE:
+        return {"coin": req.coin, **await run_inference(predict_ensemble, MODEL, req.coin, window)}
+
+    preds = await batched_predict(req.coin, window)
+    if intervals is not None:
+        bands = await run_inference(predict_intervals, MODEL, req.coin, window, min(intervals, MC_MAX_SAMPLES))
+        return {"coin": req.coin, "pred_7": preds, "intervals": bands}
     return {"coin": req.coin, "pred_7": preds}
 
 
-@app.post("/predict/today")
-def predict_single_today(req: PredictRequest):
+@app.post("/predict/today", openapi_extra=_window_body_doc(PredictRequest))
+async def predict_single_today(req: PredictRequest = Depends(predict_body)):
     if req.coin not in COIN_LIST:
         raise HTTPException(400, f"Unknown coin: {req.coin}")
-        
+
     window = req.window
-    
+
     # LIVE MODE LOGIC: Fetch fresh 72-day window
     if DATA_MODE == "LIVE":
-        try:
-            df = live_service.fetch_live_history(req.coin, days=72)
-            if not df.empty and len(df) >= 72:
-                feature_cols = [
-                    'open','high','low','close','volume','ema_10','ema_21','ma_7','ma_30',
-                    'momentum_rsi','volume_adi','volume_obv','volume_cmf','return_1','pct_change',
-                    'day_of_week','is_weekend'
-                ]
-                live_window = df[feature_cols].values.tolist()
-                if len(live_window) == 72:
-                    window = live_window
-        except Exception as e:
-            print(f"LIVE PREDICTION ERROR: {e}")
-
-    pred = predict_today(MODEL, req.coin, window)
+        df = await live_window(req.coin)
+        if df is not None:
+            window = df[FEATURE_COLS].values.tolist()
+
+    pred = (await batched_predict(req.coin, window))[0]
     return {"coin": req.coin, "today_prediction": pred}
 
 
-@app.post("/predict/bulk")
-def bulk(req: BulkRequest):
-    return predict_bulk(MODEL, req.coins, req.windows)
+@app.get("/predict/{coin}/latest")
+async def predict_latest(coin: str):
+    """
+    7-day forecast from the most recent SEQ_LEN candles the server already
+    holds; no window in the request. LIVE mode uses fresh Binance candles
+    and falls back to the feature store.
+    """
+    if coin not in COIN_LIST:
+        raise HTTPException(400, f"Unknown coin: {coin}")
+
+    if DATA_MODE == "LIVE":
+        df = await live_window(coin)
+        if df is not None:
+            window = df[FEATURE_COLS].to_numpy(dtype="float32")
+            candle_date = df['Date'].iloc[-1].strftime('%Y-%m-%d')
+            preds = await batched_predict(coin, window)
+            return {"coin": coin, "pred_7": preds, "candle_date": candle_date, "source": "LIVE"}
+
+    try:
+        entry = FEATURE_STORE.latest(coin)
+    except KeyError as e:
+        raise HTTPException(404, e.args[0])
+
+    if ENSEMBLE:
+        return {"coin": coin, "candle_date": entry.candle_date, "source": "STATIC",
+                **await run_inference(predict_ensemble, MODEL, coin, entry.window)}
+    preds = await batched_predict(coin, entry.window)
+    return {"coin": coin, "pred_7": preds, "candle_date": entry.candle_date, "source": "STATIC"}
+
+
+@app.post("/predict/bulk", openapi_extra=_window_body_doc(BulkRequest))
+async def bulk(req: BulkRequest = Depends(bulk_body)):
+    return await run_inference(predict_bulk, MODEL, req.coins, req.windows)
+
+
+def forecast_table(forecasts):
+    """{coin: 7 prices or {"error": ...}} as columns: coin, day_1..day_7, error."""
+    coins = list(forecasts)
+    ok = [not isinstance(forecasts[c], dict) for c in coins]
+    prices = np.full((len(coins), 7), np.nan)
+    if any(ok):
+        prices[ok] = [forecasts[c] for c, good in zip(coins, ok) if good]
+    table = {"coin": coins}
+    table.update((f"day_{d + 1}", np.ascontiguousarray(prices[:, d])) for d in range(7))
+    table["error"] = [None if good else forecasts[c]["error"] for c, good in zip(coins, ok)]
+    return table
+
+
+def columnar_response(columns, media, headers=None):
+    return Response(encode_columns(columns, media), media_type=media, headers=headers)
+
+
+def stream_response(chunks, media, filename):
+    """CSV / NDJSON rows streamed chunk by chunk as a download."""
+    ext = "csv" if media == CSV_TYPE else "ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{ext}"', "Vary": "Accept"}
+    return StreamingResponse(encode_rows(chunks, media), media_type=media, headers=headers)
 
 
 @app.get("/predict/all")
-def pred_all():
-    return predict_all(MODEL, COIN_LIST)
+async def pred_all(request: Request):
+    snapshot = FORECASTER.snapshot
+    if snapshot is None:
+        # First build still running
+        out = await run_inference(predict_all, MODEL, COIN_LIST)
+    else:
+        out = dict(snapshot.forecasts)
+        out.update((coin, {"error": err}) for coin, err in snapshot.errors.items())
+    media = negotiate(request.headers.get("accept"))
+    if media != JSON_TYPE:
+        return columnar_response(forecast_table(out), media)
+    return out
+
+
+@app.get("/predict/snapshot")
+def pred_snapshot():
+    snapshot = FORECASTER.snapshot
+    if snapshot is None:
+        raise HTTPException(503, "Forecast snapshot not built yet")
+    return snapshot.to_dict()
 
 
 @app.get("/model/info")
@@ -245,26 +511,132 @@ def model_info():
 
 
 @app.get("/history/{coin}")
-def history(coin: str):
+def history(
+    coin: str,
+    request: Request,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    resolution: str = "daily",
+):
+    """
+    Daily candles by default. `start` / `end` (dates, inclusive) cut the range,
+    `resolution` resamples to weekly or monthly candles or picks `limit`
+    shape-preserving points (lttb), and `limit` keeps the most recent points.
+    """
     if coin not in COIN_LIST:
         raise HTTPException(400, f"Unknown coin: {coin}")
     
+    media = negotiate(request.headers.get("accept"), COLUMNAR_TYPES + STREAM_TYPES)
     if DATA_MODE == "LIVE":
         df = live_service.fetch_live_history(coin)
         if not df.empty:
-            # Convert to same format as get_history
-            # get_history returns {"data": [{"x": date, "y": [open, high, low, close], "volume": vol}, ...]}
-            result = []
-            for _, row in df.iterrows():
-                result.append({
-                    "x": row['Date'].strftime('%Y-%m-%d'),
-                    "y": [row['Open'], row['High'], row['Low'], row['Close']],
-                    "volume": row['Volume']
-                })
-            return {"coin": coin, "data": result, "source": "LIVE"}
+            try:
+                dates, ohlcv = live_candles(df, start, end, limit, resolution)
+            except ValueError as e:
+                raise HTTPException(400, str(e))
+            if media in STREAM_TYPES:
+                return stream_response(array_chunks(to_table(dates, ohlcv), EXPORT_CHUNK_ROWS), media, coin)
+            if media != JSON_TYPE:
+                return columnar_response(to_table(dates, ohlcv), media, {"Vary": "Accept"})
+            return {"coin": coin, "data": to_records(dates, ohlcv), "source": "LIVE"}
             
-    # Static Mode (Default)
-    return get_history(coin)
+    if media in STREAM_TYPES:
+        # Chunks read lazily from the store slice
+        store = load_history_store()
+        if store is None or coin not in store:
+            raise HTTPException(404, f"No history found for {coin}")
+        try:
+            table = to_table(*query_history(store, coin, start, end, limit, resolution))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        return stream_response(array_chunks(table, EXPORT_CHUNK_ROWS), media, coin)
+
+    # Static Mode (Default): pre-encoded bytes, revalidated by ETag
+    try:
+        payload, etag = get_history_payload(coin, start, end, limit, resolution, media,
+                                            request.headers.get("if-none-match"))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if etag is None:
+        return Response(payload, media_type="application/json")
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={HISTORY_MAX_AGE}", "Vary": "Accept"}
+    if payload is None:
+        # If-None-Match matched before anything was encoded
+        return Response(status_code=304, headers=headers)
+    return Response(payload, media_type=media, headers=headers)
+
+
+@app.get("/history/{coin}/sync")
+def history_sync(coin: str, cursor: Optional[str] = None, since: Optional[str] = None):
+    """
+    Incremental history: only candles appended or revised since `cursor`
+    (from the previous response) or `since` (a date). The first call, or a
+    call after older candles changed, returns everything with resync=true.
+    """
+    if coin not in COIN_LIST:
+        raise HTTPException(400, f"Unknown coin: {coin}")
+    try:
+        result = get_history_delta(coin, cursor, since)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return Response(dumps_json(result), media_type="application/json")
+
+
+def live_candles(df, start=None, end=None, limit=None, resolution="daily"):
+    """(dates, ohlcv) of a LIVE history frame, with the static history's query handling."""
+    dates = df['Date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    lo, hi = date_bounds(dates, start, end)
+    return downsample(dates[lo:hi], df[list(OHLCV_COLUMNS)].to_numpy(dtype=float).T[:, lo:hi],
+                      limit, resolution)
+
+
+def live_history_batch(coins, frames, start=None, end=None, limit=None, resolution="daily"):
+    """
+    get_history_batch over LIVE frames: each coin's live candles, or its
+    static history when the live fetch came back empty (as /history/{coin}).
+    """
+    store = load_history_store()
+    kept, parts = [], []
+    for coin, df in zip(coins, frames):
+        if not df.empty:
+            parts.append(live_candles(df, start, end, limit, resolution))
+        elif store is not None and coin in store:
+            parts.append(query_history(store, coin, start, end, limit, resolution))
+        else:
+            continue
+        kept.append(coin)
+    offsets = np.r_[0, np.cumsum([len(dates) for dates, _ in parts], dtype=np.int64)]
+    dates = np.concatenate([d for d, _ in parts] or [np.zeros(0, dtype=np.int64)])
+    ohlcv = np.concatenate([o for _, o in parts] or [np.zeros((5, 0))], axis=1)
+    return {"coins": kept, "offsets": offsets, "columns": to_columns(dates, ohlcv), "source": "LIVE"}
+
+
+@app.post("/history/batch")
+def history_batch(req: HistoryBatchRequest):
+    """
+    History of many coins in one round trip, as one columnar payload:
+    {"coins": [...], "offsets": [...], "columns": {"x": [...], "open": [...], ...}}
+    where coin i's points are columns[k][offsets[i]:offsets[i+1]].
+    Range, resolution and limit work as in /history/{coin}, and so does LIVE
+    mode: coins are fetched concurrently, falling back to the static history.
+    """
+    coins = req.coins if req.coins is not None else COIN_LIST
+    unknown = [c for c in coins if c not in COIN_LIST]
+    if unknown:
+        raise HTTPException(400, f"Unknown coins: {', '.join(unknown)}")
+    if req.limit is not None and req.limit < 1:
+        raise HTTPException(400, "limit must be >= 1")
+    query = (req.start, req.end, req.limit, req.resolution)
+    try:
+        if DATA_MODE == "LIVE":
+            frames = list(IO_POOL.map(live_service.fetch_live_history, coins))
+            result = live_history_batch(coins, frames, *query)
+        else:
+            result = get_history_batch(coins, *query)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return Response(dumps_json(result), media_type="application/json")
 
 
 @app.get("/risk/{coin}")
@@ -294,38 +666,61 @@ def get_insights(coin: str):
 
 
 @app.get("/export/indicators/{coin}")
-def export_indicators(coin: str):
+def export_indicators(coin: str, request: Request):
     """Export technical indicators (RSI, MACD, etc.)"""
     if coin not in COIN_LIST:
         raise HTTPException(400, f"Unknown coin: {coin}")
 
+    media = negotiate(request.headers.get("accept"), COLUMNAR_TYPES + STREAM_TYPES)
     if DATA_MODE == "LIVE":
-        return live_service.get_indicators_export(coin)
-    
-    # Static Mode: Fetch history and compute indicators
-    hist = get_history(coin) # {"data": [{"x":..., "y":...}]}
-    if not hist or "data" not in hist:
-        return []
-    
-    # Convert to DataFrame for calculation
-    data = []
-    for row in hist["data"]:
-        data.append({
-            "Date": pd.to_datetime(row["x"]),
-            "Open": row["y"][0],
-            "High": row["y"][1],
-            "Low": row["y"][2],
-            "Close": row["y"][3],
-            "Volume": row["volume"]
-        })
-    df = pd.DataFrame(data)
-    df = live_service.add_technical_indicators(df)
+        if media == JSON_TYPE:
+            return live_service.get_indicators_export(coin)
+        df = live_service.fetch_live_history(coin, days=365) # 1 year of data
+    else:
+        # Static Mode: compute indicators straight from the coin's store slice
+        store = load_history_store()
+        if store is None or coin not in store:
+            return []
+        df = live_service.add_technical_indicators(store.frame(coin))
+
+    if media in STREAM_TYPES:
+        return stream_response(frame_chunks(df, EXPORT_CHUNK_ROWS), media, f"{coin}_indicators")
+    if media != JSON_TYPE:
+        # One array per column, straight from the frame's buffers
+        return columnar_response({c: df[c].to_numpy() for c in df.columns}, media, {"Vary": "Accept"})
     
     # Format for export
     df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
     return df.to_dict('records')
 
 
+@app.get("/export/history")
+def export_history(request: Request, coins: Optional[str] = None,
+                   start: Optional[str] = None, end: Optional[str] = None):
+    """
+    Stream daily candles of many coins (comma-separated `coins`, default all)
+    as CSV (Accept: text/csv) or NDJSON, one row per coin and day. Rows are
+    read from the history store in fixed-size chunks.
+    """
+    selected = coins.split(",") if coins else COIN_LIST
+    unknown = [c for c in selected if c not in COIN_LIST]
+    if unknown:
+        raise HTTPException(400, f"Unknown coins: {', '.join(unknown)}")
+    store = load_history_store()
+    if store is None or store.empty:
+        raise HTTPException(404, "Dataset not available")
+    try:
+        # Validate the range before the response starts
+        date_bounds(store.dates[:0], start, end)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    media = negotiate(request.headers.get("accept"), STREAM_TYPES)
+    media = media if media in STREAM_TYPES else NDJSON_TYPE
+    chunks = history_chunks(store, [c for c in selected if c in store], start, end, EXPORT_CHUNK_ROWS)
+    return stream_response(chunks, media, "history")
+
+
 @app.get("/export/sentiment")
 def export_sentiment():
     """Export market sentiment data."""
@@ -361,12 +756,12 @@ def export_orderbook(coin: str):
 
 @app.get("/trending")
 def trending():
-    return get_trending(MODEL, COIN_LIST)
+    return get_trending(MODEL, COIN_LIST, FORECASTER.snapshot)
 
 
 @app.post("/predict/compare")
-def compare(req: CompareRequest):
-    return compare_two(MODEL, req)
+async def compare(req: CompareRequest):
+    return await run_inference(compare_two, MODEL, req)
 
 
 @app.get("/health")
@@ -375,9 +770,16 @@ def health():
     return {"status": "OK", "uptime_sec": uptime, "mode": DATA_MODE}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: model loaded, data preloaded and warm-up finished."""
+    body = {"ready": READY, "startup": STARTUP_METRICS, "first_request_ms": FIRST_REQUEST_MS}
+    return JSONResponse(body, status_code=200 if READY else 503)
+
+
 @app.get("/version")
 def version():
-    return {"api_version": "2.0", "model_version": "TransformerV3"}
+    return {"api_version": "2.0", "model_version": "TransformerV3", "checkpoint": MODEL.model_version}
 
 
 @app.get("/stats")
@@ -385,6 +787,21 @@ def stats():
     return get_stats(MODEL, COIN_LIST)
 
 
+@app.get("/stats/batcher")
+def batcher_stats():
+    return BATCHER.stats()
+
+
+@app.get("/stats/executor")
+def executor_stats():
+    return {"torch_threads": STARTUP_METRICS.get("torch_threads"), "inference": EXECUTOR.stats()}
+
+
+@app.get("/stats/cache")
+def cache_stats():
+    return FORECAST_CACHE.stats()
+
+
 @app.get("/logs")
 def logs():
     return {"logs": ["logging system can be added here"]}
@@ -0,0 +1,154 @@
+# batcher.py
+#
+# In-process request coalescer for single-coin predictions. Callers queue a
+# (coin, window) pair and get a Future back; a single worker thread gathers
+# requests for up to BATCH_MAX_WAIT_MS (or BATCH_MAX_SIZE requests), runs one
+# batched TransformerV3 forward pass and resolves every caller's future.
+# The queue is bounded: when it is full, submit raises executor.Saturated
+# instead of letting waits grow without limit.
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from executor import Saturated
+from inference import FORECAST_CACHE, _forward, forecast_cache_key, preprocess_window
+from scaler_registry import get_registry
+
+MAX_QUEUE = 256
+STATS_WINDOW = 1000
+
+
+class _Item:
+    __slots__ = ("arr", "series_id", "key", "future", "enqueued")
+
+    def __init__(self, arr, series_id, key):
+        self.arr = arr
+        self.series_id = series_id
+        self.key = key
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, device='cpu',
+                 max_queue=MAX_QUEUE, retry_after=1):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.device = device
+        self.retry_after = retry_after
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._waits_ms = deque(maxlen=STATS_WINDOW)
+        self._requests = 0
+        self._rejected = 0
+
+    # ------------- Lifecycle ------------------
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    # ------------- Client API ------------------
+
+    def submit(self, coin, window):
+        """Queue one prediction. Invalid coins/windows raise immediately."""
+        registry = get_registry()
+        series_id = registry.series_id(coin)
+        arr = preprocess_window(window)
+        key = forecast_cache_key(self.model, registry, coin, arr)
+
+        cached = FORECAST_CACHE.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        item = _Item(arr, series_id, key)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise Saturated("predict-batcher", self.retry_after)
+        return item.future
+
+    def predict(self, coin, window, timeout=None):
+        """Blocking helper: the 7-day forecast for one coin."""
+        return self.submit(coin, window).result(timeout)
+
+    # ------------- Worker ------------------
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                inv = _forward(
+                    self.model,
+                    np.stack([it.arr for it in batch]),
+                    [it.series_id for it in batch],
+                    get_registry(),
+                    self.device,
+                )
+            except Exception as e:
+                for it in batch:
+                    it.future.set_exception(e)
+            else:
+                for it, preds in zip(batch, inv.tolist()):
+                    FORECAST_CACHE.put(it.key, preds)
+                    it.future.set_result(preds)
+            self._record(batch, started)
+
+    def _record(self, batch, started):
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            self._waits_ms.extend((started - it.enqueued) * 1000 for it in batch)
+
+    # ------------- Stats ------------------
+
+    def stats(self):
+        with self._stats_lock:
+            waits = np.array(self._waits_ms) if self._waits_ms else np.zeros(1)
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "rejected": self._rejected,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self._requests,
+                "batches": batches,
+                "mean_batch_size": self._requests / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "wait_ms": {
+                    "mean": float(waits.mean()),
+                    "p50": float(np.percentile(waits, 50)),
+                    "p99": float(np.percentile(waits, 99)),
+                    "max": float(waits.max()),
+                },
+            }
@@ -0,0 +1,70 @@
+# bench_burst.py
+#
+# Burst load against a running API: C concurrent clients fire requests at
+# an inference endpoint and the latency distribution of accepted requests
+# is reported next to the number shed with 503. With the bounded executor
+# p99 should stay flat as C grows, with the excess turned into fast 503s.
+#
+# Usage (server running on :8000):
+#   python bench_burst.py --concurrency 8 32 128 --requests 400
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def _bulk_body(n, seed):
+    # Fresh random float32 windows per request, so the forecast cache never
+    # hits and request parsing stays negligible next to the forward pass
+    return np.random.default_rng(seed).random((n, 72, 17), dtype=np.float32).tobytes()
+
+
+def _one(url, body):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/octet-stream"})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - t0) * 1000
+
+
+def burst(url, n_coins, concurrency, requests):
+    bodies = [_bulk_body(n_coins, i) for i in range(requests)]
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda body: _one(url, body), bodies))
+    ok = np.array([ms for status, ms in results if status == 200])
+    shed = sum(1 for status, _ in results if status == 503)
+    return ok, shed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst latency and load shedding")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--requests", type=int, default=400)
+    args = parser.parse_args()
+
+    with urllib.request.urlopen(f"{args.url}/coins") as resp:
+        coins = json.loads(resp.read())["coins"]
+    url = f"{args.url}/predict/bulk?coins={','.join(coins)}"
+
+    print(f"{'Clients':>7} | {'OK':>5} | {'503':>5} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 46)
+    for c in args.concurrency:
+        ok, shed = burst(url, len(coins), c, args.requests)
+        p50, p99 = (np.percentile(ok, 50), np.percentile(ok, 99)) if len(ok) else (0.0, 0.0)
+        print(f"{c:>7} | {len(ok):>5} | {shed:>5} | {p50:>8.1f} | {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench_formats.py
+#
+# Payload size and encode CPU of the negotiated response formats for the
+# table-shaped endpoints: /history/{coin}, /export/indicators/{coin} and
+# /predict/all. The JSON rows are timed the way FastAPI serves them
+# (jsonable_encoder + json.dumps), starting from the same store slice or
+# frame the endpoint has; Arrow and MessagePack encode the column arrays.
+# Formats whose library is not installed are skipped.
+#
+# Usage:
+#   python bench_formats.py [--coin coin_Bitcoin] [--repeat 50]
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app import forecast_table
+from history_query import to_records, to_table
+from inference import load_history_store
+from live_data_service import live_service
+from response_codec import ARROW_TYPE, MSGPACK_TYPE, encode_columns, msgpack, pa
+
+FORMATS = [("arrow", ARROW_TYPE, pa), ("msgpack", MSGPACK_TYPE, msgpack)]
+
+
+def time_ms(fn, repeat):
+    out = fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000, len(out)
+
+
+def fastapi_json(obj):
+    return json.dumps(jsonable_encoder(obj)).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON rows with Arrow / MessagePack columns")
+    parser.add_argument("--coin", default="coin_Bitcoin")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    store = load_history_store()
+    if store is None or args.coin not in store:
+        raise SystemExit(f"No history for {args.coin}")
+    dates, ohlcv = store.coin_dates(args.coin), store.coin_columns(args.coin)
+    features = live_service.add_technical_indicators(store.frame(args.coin))
+
+    def indicator_rows():
+        df = features.copy()
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+        return fastapi_json(df.to_dict('records'))
+
+    # 15 coins x 7 days, as the forecast snapshot holds them
+    forecasts = {f"coin_{i}": [float(i + d) for d in range(7)] for i in range(15)}
+    cases = {
+        "history": (lambda: fastapi_json({"coin": args.coin, "data": to_records(dates, ohlcv)}),
+                    lambda: to_table(dates, ohlcv)),
+        "indicators": (indicator_rows,
+                       lambda: {c: features[c].to_numpy() for c in features.columns}),
+        "predict/all": (lambda: fastapi_json(forecasts), lambda: forecast_table(forecasts)),
+    }
+
+    print(f"{'Endpoint':<12} | {'Format':<8} | {'KB':>8} | {'Encode ms':>10}")
+    print("-" * 48)
+    for name, (rows, columns) in cases.items():
+        ms, size = time_ms(rows, args.repeat)
+        print(f"{name:<12} | {'json':<8} | {size / 1024:>8.1f} | {ms:>10.3f}")
+        for fmt, media, lib in FORMATS:
+            if lib is None:
+                continue
+            ms, size = time_ms(lambda: encode_columns(columns(), media), args.repeat)
+            print(f"{name:<12} | {fmt:<8} | {size / 1024:>8.1f} | {ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_startup.py
+#
+# Startup benchmark: import time and resident memory of a worker that loads
+# the serving model through the Lightning class (model.TransformerV3) versus
+# the plain nn.Module variant (inference_model.TransformerV3Net). Each variant
+# runs in a fresh interpreter so imports are measured cold.
+#
+# Usage:
+#   python bench_startup.py [--checkpoint crypto_model_package/best-v3-seed42_state_dict.pth]
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+CHECKPOINT = Path(__file__).resolve().parent / "crypto_model_package" / "best-v3-seed42_state_dict.pth"
+
+_PRELUDE = """
+import json, os, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def load_checkpoint(path):
+    # Lightning checkpoints wrap the weights in {"state_dict": ...}, as
+    # inference.load_weights expects
+    sd = torch.load(path, map_location="cpu")
+    if isinstance(sd, dict) and "state_dict" in sd:
+        sd = sd["state_dict"]
+    return sd
+
+t0 = time.perf_counter()
+import torch
+t_torch = time.perf_counter()
+"""
+
+_VARIANTS = {
+    "lightning": """
+from model import TransformerV3
+t_model = time.perf_counter()
+m = TransformerV3(num_features=17, num_series=15)
+sd = load_checkpoint(CKPT) if CKPT else None
+if sd is not None:
+    m.load_state_dict(sd)
+""",
+    "plain": """
+from inference_model import TransformerV3Net, strip_positional_buffer
+t_model = time.perf_counter()
+m = TransformerV3Net(num_features=17, num_series=15)
+sd = load_checkpoint(CKPT) if CKPT else None
+if sd is not None:
+    sd = {k.replace("model.", ""): v for k, v in sd.items()}
+    m.load_state_dict(strip_positional_buffer(sd))
+""",
+}
+
+_REPORT = """
+m.eval()
+t_ready = time.perf_counter()
+print(json.dumps({
+    "torch_import_ms": (t_torch - t0) * 1000,
+    "model_import_ms": (t_model - t_torch) * 1000,
+    "ready_ms": (t_ready - t0) * 1000,
+    "rss_mb": rss_mb(),
+    "modules_loaded": len(sys.modules),
+}))
+"""
+
+
+def run_variant(name, checkpoint):
+    ckpt = repr(str(checkpoint)) if checkpoint and Path(checkpoint).exists() else "None"
+    code = f"CKPT = {ckpt}\n" + _PRELUDE + _VARIANTS[name] + _REPORT
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=Path(__file__).resolve().parent, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare worker startup cost of the model classes")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if not Path(args.checkpoint).exists():
+        print(f"Checkpoint not found ({args.checkpoint}); measuring with random weights")
+
+    results = {}
+    for name in _VARIANTS:
+        runs = [run_variant(name, args.checkpoint) for _ in range(args.runs)]
+        # Best of N: least disturbed by other processes
+        results[name] = {k: min(r[k] for r in runs) for k in runs[0]}
+
+    print(f"{'Metric':<18} | {'Lightning':>10} | {'Plain':>10}")
+    print("-" * 46)
+    for key in results["lightning"]:
+        print(f"{key:<18} | {results['lightning'][key]:>10.1f} | {results['plain'][key]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
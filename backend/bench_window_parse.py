@@ -0,0 +1,75 @@
+# bench_window_parse.py
+#
+# Request parse cost of the predict window formats: JSON through Pydantic
+# (PredictRequest / BulkRequest) plus preprocess_window, versus raw float32
+# and .npy bodies decoded with window_codec. Only parsing is timed, not the
+# forward pass.
+#
+# Usage:
+#   python bench_window_parse.py [--coins 15] [--repeat 200]
+
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+
+from app import BulkRequest, PredictRequest
+from inference import NUM_FEATURES, SEQ_LEN, preprocess_window
+from window_codec import decode_windows
+
+
+def time_us(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and binary window parsing")
+    parser.add_argument("--coins", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    windows = rng.random((args.coins, SEQ_LEN, NUM_FEATURES)).astype(np.float32)
+    coins = [f"coin_{i}" for i in range(args.coins)]
+
+    single_json = json.dumps({"coin": coins[0], "window": windows[0].tolist()}).encode()
+    bulk_json = json.dumps({"coins": coins,
+                            "windows": {c: w.tolist() for c, w in zip(coins, windows)}}).encode()
+    single_raw, bulk_raw = windows[0].tobytes(), windows.tobytes()
+    buf = io.BytesIO()
+    np.save(buf, windows)
+    bulk_npy = buf.getvalue()
+
+    def json_single():
+        preprocess_window(PredictRequest.model_validate_json(single_json).window)
+
+    def json_bulk():
+        req = BulkRequest.model_validate_json(bulk_json)
+        for c in req.coins:
+            preprocess_window(req.windows[c])
+
+    cases = [
+        ("single", "json", len(single_json), json_single),
+        ("single", "float32", len(single_raw),
+         lambda: preprocess_window(decode_windows(single_raw, "application/octet-stream", 1)[0])),
+        (f"bulk x{args.coins}", "json", len(bulk_json), json_bulk),
+        (f"bulk x{args.coins}", "float32", len(bulk_raw),
+         lambda: decode_windows(bulk_raw, "application/octet-stream", args.coins)),
+        (f"bulk x{args.coins}", "npy", len(bulk_npy),
+         lambda: decode_windows(bulk_npy, "application/x-npy", args.coins)),
+    ]
+
+    print(f"{'Request':<12} | {'Format':<8} | {'Body KB':>8} | {'Parse us':>10}")
+    print("-" * 48)
+    for name, fmt, size, fn in cases:
+        print(f"{name:<12} | {fmt:<8} | {size / 1024:>8.1f} | {time_us(fn, args.repeat):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# config.py
+#
+# Serving options. Every value can be overridden with an ULTRONFX_* environment
+# variable so worker processes can be tuned without code changes.
+
+import os
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(f"ULTRONFX_{name}")
+    return default if value is None else cast(value)
+
+
+def _flag(value):
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Model execution backend: 'eager', 'torchscript' or 'onnxruntime'
+MODEL_BACKEND = _env("MODEL_BACKEND", "eager")
+
+# Dynamic int8 quantization (eager backend only). Activation is refused when
+# the mean held-out drift from fp32, in scaled close units, exceeds the limit.
+QUANTIZE = _env("QUANTIZE", False, _flag)
+QUANT_MAX_ERROR = _env("QUANT_MAX_ERROR", 0.02, float)
+
+# Micro-batching of single-coin /predict requests: a batch runs when it has
+# BATCH_MAX_SIZE requests or its first one has waited BATCH_MAX_WAIT_MS
+BATCH_MAX_SIZE = _env("BATCH_MAX_SIZE", 32, int)
+BATCH_MAX_WAIT_MS = _env("BATCH_MAX_WAIT_MS", 3.0, float)
+
+# Forecast cache: LRU entries kept per worker, and their lifetime in seconds
+# (0 = until evicted; entries are keyed by window content and model version,
+# so they never go stale)
+FORECAST_CACHE_SIZE = _env("FORECAST_CACHE_SIZE", 4096, int)
+FORECAST_CACHE_TTL = _env("FORECAST_CACHE_TTL", 0.0, float)
+
+# Serve every *_state_dict.pth checkpoint as one stacked ensemble; /predict
+# then also returns the per-day spread across members.
+ENSEMBLE = _env("ENSEMBLE", False, _flag)
+
+# Monte-Carlo dropout intervals: upper bound on the samples a single
+# /predict?intervals=K request may ask for
+MC_MAX_SAMPLES = _env("MC_MAX_SAMPLES", 64, int)
+
+# Inference execution. Model work runs on a bounded pool of INFER_WORKERS
+# threads (plus the micro-batcher thread); requests beyond the queue limits
+# get 503 with Retry-After. TORCH_THREADS=0 splits the cores evenly between
+# those threads. LIVE-mode network calls use a separate pool of IO_WORKERS.
+INFER_WORKERS = _env("INFER_WORKERS", 2, int)
+INFER_QUEUE = _env("INFER_QUEUE", 32, int)
+BATCHER_QUEUE = _env("BATCHER_QUEUE", 256, int)
+TORCH_THREADS = _env("TORCH_THREADS", 0, int)
+IO_WORKERS = _env("IO_WORKERS", 16, int)
+RETRY_AFTER_SEC = _env("RETRY_AFTER_SEC", 1, int)
+
+# Browser cache lifetime of static-mode /history responses; after it expires
+# clients revalidate with If-None-Match and get 304 while the data is unchanged
+HISTORY_MAX_AGE = _env("HISTORY_MAX_AGE", 60, int)
+
+# Streaming exports (Accept: text/csv or application/x-ndjson) are written
+# in chunks of this many rows; candle exports read each chunk from the store
+EXPORT_CHUNK_ROWS = _env("EXPORT_CHUNK_ROWS", 1000, int)
@@ -0,0 +1,126 @@
+# ensemble.py
+#
+# Multi-seed ensemble serving. Every *_state_dict.pth checkpoint in
+# crypto_model_package/ (e.g. the notebook's seeds 7, 42 and 123) becomes a
+# member; their parameters are stacked along a leading member dimension and
+# all members are evaluated in one vectorized call with torch.func.vmap.
+
+import copy
+
+import torch
+from torch.func import functional_call, stack_module_state, vmap
+
+from inference import (
+    MODEL_DIR,
+    _scale_inputs,
+    load_weights,
+    preprocess_window,
+)
+from scaler_registry import get_registry
+
+
+class EnsembleModel:
+    """Stacked-parameter ensemble with the model's (x, s) -> forecast interface.
+
+    Calling it returns the member mean, so the batched and cached paths work
+    unchanged; `forward_members` exposes the per-member outputs.
+    """
+
+    def __init__(self, members, names):
+        self.names = list(names)
+        self.params, self.buffers = stack_module_state(members)
+        # Weightless skeleton; functional_call substitutes one member's tensors
+        self._base = copy.deepcopy(members[0]).to("meta")
+        self._vmapped = vmap(self._member_forward, in_dims=(0, 0, None, None))
+        self.num_parameters = sum(p.numel() for p in self.params.values())
+        self.num_series = members[0].series_emb.num_embeddings
+
+    def _member_forward(self, params, buffers, x, s):
+        return functional_call(self._base, (params, buffers), (x, s))
+
+    def forward_members(self, x, s):
+        """(M, B, PRED_LEN) scaled forecasts, one row per member."""
+        return self._vmapped(self.params, self.buffers, x, s)
+
+    def __call__(self, x, s):
+        return self.forward_members(x, s).mean(dim=0)
+
+    def __len__(self):
+        return len(self.names)
+
+    def eval(self):
+        return self
+
+    def share_memory(self):
+        for t in list(self.params.values()) + list(self.buffers.values()):
+            t.share_memory_()
+        return self
+
+
+def list_checkpoints(model_dir=MODEL_DIR):
+    return sorted(model_dir.glob("*_state_dict.pth"))
+
+
+def load_ensemble(device='cpu'):
+    """Load every checkpoint as an ensemble member. Same return shape as load_model."""
+    files = list_checkpoints()
+    if not files:
+        raise FileNotFoundError(f"No *_state_dict.pth checkpoints in {MODEL_DIR}")
+
+    registry = get_registry()
+    members = [load_weights(f, len(registry), device) for f in files]
+    names = [f.name.replace("_state_dict.pth", "") for f in files]
+
+    model = EnsembleModel(members, names)
+    model.model_version = "ensemble:" + ",".join(
+        f"{n}@{f.stat().st_mtime_ns:x}" for n, f in zip(names, files)
+    )
+
+    coin_to_id = dict(registry.coin_to_id)
+    id_to_coin = {v: k for k, v in coin_to_id.items()}
+    return model, coin_to_id, id_to_coin
+
+
+def predict_ensemble(model, coin_name, window, device='cpu'):
+    """Mean 7-day forecast plus the per-day spread (std) across members."""
+    registry = get_registry()
+    series_id = registry.series_id(coin_name)
+    arr = preprocess_window(window)
+
+    x, s, norm = _scale_inputs(arr[None], [series_id], registry, device)
+    with torch.no_grad():
+        out = model.forward_members(x, s)                  # M B PRED_LEN
+    prices = norm.denormalize_close(out, s)[:, 0].cpu().numpy()   # M PRED_LEN
+
+    return {
+        "pred_7": prices.mean(axis=0).tolist(),
+        "spread_7": prices.std(axis=0).tolist(),
+        "members": len(model),
+    }
+
+
+if __name__ == "__main__":
+    # Latency: one ensemble call vs the members run one after another
+    import time
+    from inference import NUM_FEATURES, SEQ_LEN
+
+    registry = get_registry()
+    files = list_checkpoints()
+    members = [load_weights(f, len(registry)) for f in files]
+    ens = EnsembleModel(members, [f.name for f in files])
+    print(f"Members: {ens.names}")
+
+    with torch.no_grad():
+        for b in (1, 16):
+            x = torch.randn(b, SEQ_LEN, NUM_FEATURES)
+            s = torch.zeros(b, dtype=torch.long)
+            timings = {}
+            for name, fn in (("single", lambda: members[0](x, s)),
+                             ("sequential", lambda: [m(x, s) for m in members]),
+                             ("ensemble", lambda: ens(x, s))):
+                fn()
+                t0 = time.perf_counter()
+                for _ in range(10):
+                    fn()
+                timings[name] = (time.perf_counter() - t0) * 100
+            print(f"B={b:<3} " + "  ".join(f"{k}={v:.1f}ms" for k, v in timings.items()))
@@ -0,0 +1,99 @@
+# executor.py
+#
+# Thread pools for request work that must not run on Starlette's default
+# threadpool. CPU-bound inference (bulk scoring, ensembles, MC-dropout, the
+# micro-batcher's forward passes) gets a small bounded pool sized together
+# with torch's intra-op threads, so bursts queue briefly or are shed with a
+# 503 instead of oversubscribing the cores. Blocking network calls of LIVE
+# mode (Binance, CoinGecko) get their own pool and never wait behind a
+# forward pass.
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+STATS_WINDOW = 1000
+
+
+class Saturated(RuntimeError):
+    """Raised instead of queueing when an executor's queue is full."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is saturated, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def torch_threads_per_worker(workers, cpu_count=None):
+    """Split the cores between inference workers (plus the batcher thread)."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // (workers + 1))
+
+
+def configure_torch_threads(n):
+    torch.set_num_threads(n)
+    return torch.get_num_threads()
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor with admission control: at most `max_queue` tasks
+    wait for a worker; submitting beyond that raises Saturated. The time
+    each task spent queued is recorded.
+    """
+
+    def __init__(self, name, workers, max_queue, retry_after=1):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._stats_lock = threading.Lock()
+        self._waits_ms = deque(maxlen=STATS_WINDOW)
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise Saturated(self.name, self.retry_after)
+        enqueued = time.perf_counter()
+        try:
+            future = self._pool.submit(self._call, enqueued, fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _call(self, enqueued, fn, args, kwargs):
+        wait_ms = (time.perf_counter() - enqueued) * 1000
+        with self._stats_lock:
+            self._waits_ms.append(wait_ms)
+            self._completed += 1
+        return fn(*args, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        with self._stats_lock:
+            waits = np.array(self._waits_ms) if self._waits_ms else np.zeros(1)
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "queue_wait_ms": {
+                    "mean": float(waits.mean()),
+                    "p50": float(np.percentile(waits, 50)),
+                    "p99": float(np.percentile(waits, 99)),
+                    "max": float(waits.max()),
+                },
+            }
@@ -0,0 +1,315 @@
+# export_model.py
+#
+# TorchScript / ONNX export of the TransformerV3 inference path, the optimized
+# serving backends used by inference.load_model(backend=...), and a parity
+# check + latency benchmark against the eager model.
+#
+# Usage:
+#   python export_model.py                      # export both formats
+#   python export_model.py --check --bench      # export, verify and benchmark
+#   python export_model.py --scaled --check     # self-contained graph with the
+#                                               # per-coin scaling built in
+
+import argparse
+import io
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+BACKENDS = ("eager", "torchscript", "onnxruntime")
+BENCH_BATCH_SIZES = (1, 4, 16, 64)
+
+
+# ----------------------------------------------------
+# INFERENCE GRAPH
+# ----------------------------------------------------
+class InferenceGraph(nn.Module):
+    """
+    The TransformerV3 forward pass as a plain nn.Module: input_proj,
+    positional encoding, encoder, series embedding and head. Only the first
+    SEQ_LEN positional rows are kept, and nothing Lightning-specific is
+    reachable, so the module traces cleanly.
+    """
+
+    def __init__(self, model, seq_len):
+        super().__init__()
+        self.input_proj = model.input_proj
+        self.transformer = model.transformer
+        self.series_emb = model.series_emb
+        self.head = model.head
+        self.register_buffer("pe", model.pos_enc.pe[:, :seq_len].clone())
+
+    def forward(self, x, s):
+        x = self.input_proj(x) + self.pe
+        x = self.transformer(x)
+        out = torch.cat([x[:, -1, :], self.series_emb(s)], dim=1)
+        return self.head(out)
+
+
+def _example_inputs(seq_len, num_features, batch=2):
+    return torch.zeros(batch, seq_len, num_features), torch.zeros(batch, dtype=torch.long)
+
+
+def _graph(model, seq_len, normalizer=None):
+    graph = InferenceGraph(model, seq_len)
+    if normalizer is not None:
+        # Raw windows in, close prices out
+        from inference_model import ScaledForecastNet
+        graph = ScaledForecastNet(graph, normalizer)
+    return graph.eval()
+
+
+def trace_torchscript(model, seq_len, num_features, normalizer=None):
+    graph = _graph(model, seq_len, normalizer)
+    with torch.no_grad():
+        traced = torch.jit.trace(graph, _example_inputs(seq_len, num_features), check_trace=False)
+    return torch.jit.freeze(traced)
+
+
+def export_onnx(model, seq_len, num_features, f, normalizer=None):
+    """Write the ONNX graph to a path or file-like object."""
+    graph = _graph(model, seq_len, normalizer)
+    # Traced with autograd on so nn.TransformerEncoder takes its regular
+    # path; the fused fast-path kernel has no ONNX symbolic.
+    torch.onnx.export(
+        graph, _example_inputs(seq_len, num_features), f,
+        input_names=["x", "s"], output_names=["y"],
+        dynamic_axes={"x": {0: "batch"}, "s": {0: "batch"}, "y": {0: "batch"}},
+        opset_version=17, dynamo=False,
+    )
+
+
+class OnnxRuntimeModel:
+    """onnxruntime session with the same (x, s) -> tensor interface as the model."""
+
+    def __init__(self, path_or_bytes, num_parameters=0, num_series=None, intra_op_threads=0):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 0 lets onnxruntime take every core; the server passes its per-worker
+        # share so concurrent inference threads do not oversubscribe the CPU
+        opts.intra_op_num_threads = intra_op_threads
+        opts.inter_op_num_threads = 1
+        src = str(path_or_bytes) if not isinstance(path_or_bytes, bytes) else path_or_bytes
+        self.session = ort.InferenceSession(src, opts, providers=["CPUExecutionProvider"])
+        self.num_parameters = num_parameters
+        self.num_series = num_series
+
+    def __call__(self, x, s):
+        out = self.session.run(None, {"x": x.cpu().numpy(), "s": s.cpu().numpy()})[0]
+        return torch.from_numpy(out)
+
+    def eval(self):
+        return self
+
+
+# ----------------------------------------------------
+# BACKEND LOADING
+# ----------------------------------------------------
+def artifact_paths(model_dir, seed_choice, scaled=False):
+    stem = f"{seed_choice}.scaled" if scaled else seed_choice
+    return {
+        "torchscript": model_dir / f"{stem}.torchscript.pt",
+        "onnxruntime": model_dir / f"{stem}.onnx",
+    }
+
+
+def _fresh(artifact, weight_file):
+    return artifact.exists() and artifact.stat().st_mtime_ns >= weight_file.stat().st_mtime_ns
+
+
+def load_backend(model, backend, weight_file, seq_len, num_features, device='cpu', threads=0):
+    """
+    Wrap an eager TransformerV3 in the requested backend. A previously
+    exported artifact is used when it is newer than the checkpoint,
+    otherwise the graph is built in memory. `threads` is the onnxruntime
+    intra-op thread count (0 = all cores).
+    """
+    if backend == "eager":
+        return model
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+    num_parameters = sum(p.numel() for p in model.parameters())
+    num_series = model.series_emb.num_embeddings
+    seed_choice = weight_file.name.replace("_state_dict.pth", "")
+    artifact = artifact_paths(weight_file.parent, seed_choice)[backend]
+
+    if backend == "torchscript":
+        if _fresh(artifact, weight_file):
+            scripted = torch.jit.load(str(artifact), map_location=device)
+        else:
+            scripted = trace_torchscript(model, seq_len, num_features)
+        # Frozen modules inline their weights, so parameters() is empty
+        scripted.num_parameters = num_parameters
+        scripted.num_series = num_series
+        return scripted
+
+    if device != 'cpu':
+        raise ValueError("onnxruntime backend is CPU-only")
+    if _fresh(artifact, weight_file):
+        return OnnxRuntimeModel(artifact, num_parameters, num_series, threads)
+    buf = io.BytesIO()
+    export_onnx(model, seq_len, num_features, buf)
+    return OnnxRuntimeModel(buf.getvalue(), num_parameters, num_series, threads)
+
+
+# ----------------------------------------------------
+# PARITY + BENCHMARK
+# ----------------------------------------------------
+def sample_real_windows(per_coin=8, horizon=0, tail_frac=1.0, raw=False):
+    """
+    Scaled model windows taken from research/my_cypto_dataset.csv.
+
+    Returns (x, series_ids, targets) where x is (N, SEQ_LEN, NUM_FEATURES)
+    and targets holds the next `horizon` scaled closes (None if horizon=0).
+    Windows are spread evenly over the last `tail_frac` of each coin's
+    history, newest last. With raw=True everything stays in feature units.
+    """
+    from inference import FEATURE_COLS, SEQ_LEN, load_history_store
+    from live_data_service import live_service
+    from scaler_registry import get_registry
+
+    store = load_history_store()
+    if store is None or store.empty:
+        raise FileNotFoundError("Dataset not available")
+
+    registry = get_registry()
+    close_idx = FEATURE_COLS.index("close")
+    xs, sids, ys = [], [], []
+    for coin in store.coins:
+        if coin not in registry:
+            continue
+        feats = live_service.add_technical_indicators(store.frame(coin))
+        data = feats[FEATURE_COLS].to_numpy(dtype=float)
+        sid = registry.series_id(coin)
+        if not raw:
+            center, scale = registry.params(np.array([sid]))
+            data = (data - center) / scale
+
+        last_start = len(data) - SEQ_LEN - horizon
+        if last_start < 0:
+            continue
+        first_start = int(last_start * (1 - tail_frac))
+        for start in np.linspace(first_start, last_start, per_coin).astype(int):
+            xs.append(data[start:start + SEQ_LEN])
+            ys.append(data[start + SEQ_LEN:start + SEQ_LEN + horizon, close_idx])
+            sids.append(sid)
+
+    x = torch.tensor(np.stack(xs), dtype=torch.float32)
+    s = torch.tensor(sids, dtype=torch.long)
+    y = torch.tensor(np.stack(ys), dtype=torch.float32) if horizon else None
+    return x, s, y
+
+
+def parity_check(reference, candidate, x, s):
+    with torch.no_grad():
+        ref = reference(x, s)
+        out = candidate(x, s)
+    err = (out - ref).abs()
+    return {"max_abs_err": float(err.max()), "mean_abs_err": float(err.mean())}
+
+
+def benchmark(model, seq_len, num_features, batch_sizes=BENCH_BATCH_SIZES, repeats=20):
+    """Median latency in milliseconds per forward pass, per batch size."""
+    out = {}
+    with torch.no_grad():
+        for b in batch_sizes:
+            x = torch.randn(b, seq_len, num_features)
+            s = torch.zeros(b, dtype=torch.long)
+            model(x, s)
+            times = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                model(x, s)
+                times.append((time.perf_counter() - t0) * 1000)
+            out[b] = float(np.median(times))
+    return out
+
+
+# ----------------------------------------------------
+# CLI
+# ----------------------------------------------------
+def main():
+    from inference import MODEL_DIR, NUM_FEATURES, SEQ_LEN, load_model
+    from scaler_registry import get_registry
+
+    parser = argparse.ArgumentParser(description="Export TransformerV3 for optimized CPU serving")
+    parser.add_argument("--seed", default="best-v3-seed42")
+    parser.add_argument("--format", nargs="+", default=["torchscript", "onnx"], choices=["torchscript", "onnx"])
+    parser.add_argument("--check", action="store_true", help="numerical parity against eager on real windows")
+    parser.add_argument("--bench", action="store_true", help="latency benchmark across batch sizes")
+    parser.add_argument("--scaled", action="store_true",
+                        help="bake the per-coin scaler into the graph (raw windows in, prices out)")
+    args = parser.parse_args()
+
+    eager, _, _ = load_model(args.seed, backend="eager")
+    if args.scaled:
+        normalizer = get_registry().normalizer()
+        export_scaled(eager, normalizer, args, SEQ_LEN, NUM_FEATURES, MODEL_DIR)
+        return
+    paths = artifact_paths(MODEL_DIR, args.seed)
+
+    if "torchscript" in args.format:
+        trace_torchscript(eager, SEQ_LEN, NUM_FEATURES).save(str(paths["torchscript"]))
+        print(f"Saved {paths['torchscript']}")
+    if "onnx" in args.format:
+        export_onnx(eager, SEQ_LEN, NUM_FEATURES, str(paths["onnxruntime"]))
+        print(f"Saved {paths['onnxruntime']}")
+
+    backends = {"eager": eager}
+    for name in ("torchscript", "onnxruntime"):
+        if paths[name].exists():
+            backends[name] = load_model(args.seed, backend=name)[0]
+
+    if args.check:
+        try:
+            x, s, _ = sample_real_windows()
+        except FileNotFoundError:
+            print("Dataset not available, checking on random windows")
+            x, s = torch.randn(64, SEQ_LEN, NUM_FEATURES), torch.arange(64) % eager.series_emb.num_embeddings
+        for name, m in backends.items():
+            if name != "eager":
+                print(f"Parity {name:<12} {parity_check(eager, m, x, s)}")
+
+    if args.bench:
+        print(f"{'Backend':<12} | " + " | ".join(f"B={b:<5}" for b in BENCH_BATCH_SIZES) + "  (median ms)")
+        for name, m in backends.items():
+            res = benchmark(m, SEQ_LEN, NUM_FEATURES)
+            print(f"{name:<12} | " + " | ".join(f"{res[b]:7.2f}" for b in BENCH_BATCH_SIZES))
+
+
+def export_scaled(eager, normalizer, args, seq_len, num_features, model_dir):
+    """Export and check the self-contained graphs; these are standalone
+    artifacts for consumers outside this API, not serving backends."""
+    from inference_model import ScaledForecastNet
+
+    paths = artifact_paths(model_dir, args.seed, scaled=True)
+    candidates = {}
+    if "torchscript" in args.format:
+        traced = trace_torchscript(eager, seq_len, num_features, normalizer)
+        traced.save(str(paths["torchscript"]))
+        candidates["torchscript"] = traced
+        print(f"Saved {paths['torchscript']}")
+    if "onnx" in args.format:
+        export_onnx(eager, seq_len, num_features, str(paths["onnxruntime"]), normalizer)
+        candidates["onnxruntime"] = OnnxRuntimeModel(paths["onnxruntime"])
+        print(f"Saved {paths['onnxruntime']}")
+
+    if args.check:
+        reference = ScaledForecastNet(eager, normalizer).eval()
+        try:
+            x, s, _ = sample_real_windows(raw=True)
+        except FileNotFoundError:
+            print("Dataset not available, checking on random windows")
+            x = torch.rand(64, seq_len, num_features) * normalizer.scale.max(0).values.float()
+            s = torch.arange(64) % normalizer.center.shape[0]
+        for name, m in candidates.items():
+            print(f"Parity {name:<12} {parity_check(reference, m, x, s)}  (price units)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# feature_store.py
+#
+# Materialized model inputs. For every coin the latest SEQ_LEN x 17 feature
+# window is computed once from the daily candles and kept as a read-only
+# float32 array, so GET /predict/{coin}/latest and the background forecaster
+# never rebuild indicators on the request path. When the dataset changes only
+# coins whose candles actually changed are recomputed.
+
+import threading
+
+import numpy as np
+
+from inference import (
+    FEATURE_COLS,
+    SEQ_LEN,
+    history_version,
+    load_history_store,
+    refresh_history_data,
+)
+from live_data_service import live_service
+
+CLOSE_IDX = FEATURE_COLS.index('close')
+
+
+def build_feature_window(coin_df):
+    """Latest SEQ_LEN x 17 model window from a coin's daily OHLCV candles."""
+    df = coin_df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].sort_values('Date')
+    df = live_service.add_technical_indicators(df.reset_index(drop=True))
+    if len(df) < SEQ_LEN:
+        raise ValueError(f"Need {SEQ_LEN} candles, have {len(df)}")
+    return df[FEATURE_COLS].tail(SEQ_LEN).to_numpy(dtype=float)
+
+
+def _candle_fingerprint(store, coin):
+    """
+    Cheap per-coin change detector: row count, last date and column sums, so
+    appended candles and revised past candles are both noticed.
+    """
+    dates, cols = store.coin_dates(coin), store.coin_columns(coin)
+    last = int(dates[-1]) if len(dates) else None
+    return (len(dates), last, float(cols[3].sum(dtype=np.float64)), float(cols[4].sum(dtype=np.float64)))
+
+
+def _day(epoch_ns):
+    return str(np.datetime64(epoch_ns, 'ns').astype('datetime64[D]')) if epoch_ns is not None else None
+
+
+class FeatureEntry:
+    __slots__ = ("window", "candle_date", "fingerprint")
+
+    def __init__(self, window, candle_date, fingerprint):
+        window = np.ascontiguousarray(window, dtype=np.float32)
+        window.flags.writeable = False
+        self.window = window
+        self.candle_date = candle_date
+        self.fingerprint = fingerprint
+
+    @property
+    def last_close(self):
+        return float(self.window[-1, CLOSE_IDX])
+
+
+class FeatureStore:
+    def __init__(self, coins):
+        self.coins = list(coins)
+        self._entries = {}
+        self._errors = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Dataset version the store was last built from."""
+        return self._version
+
+    def refresh(self):
+        """
+        Bring the store up to date with the dataset. Returns the coins whose
+        windows were recomputed.
+        """
+        with self._lock:
+            refresh_history_data()
+            version = history_version()
+            if version == self._version:
+                return []
+
+            store = load_history_store()
+            entries, errors, updated = dict(self._entries), {}, []
+            for coin in self.coins:
+                if store is None or coin not in store:
+                    entries.pop(coin, None)
+                    errors[coin] = f"No history found for {coin}"
+                    continue
+                fingerprint = _candle_fingerprint(store, coin)
+                old = entries.get(coin)
+                if old is not None and old.fingerprint == fingerprint:
+                    continue
+                try:
+                    window = build_feature_window(store.frame(coin))
+                except Exception as e:
+                    entries.pop(coin, None)
+                    errors[coin] = str(e)
+                    continue
+                entries[coin] = FeatureEntry(window, _day(fingerprint[1]), fingerprint)
+                updated.append(coin)
+
+            # Swap whole dicts so readers never see a half-updated store
+            self._entries, self._errors, self._version = entries, errors, version
+            if updated:
+                print(f"Feature store updated: {len(updated)} coins, data {version}")
+            return updated
+
+    def latest(self, coin):
+        """The coin's FeatureEntry; raises KeyError with the build error if missing."""
+        entry = self._entries.get(coin)
+        if entry is None:
+            raise KeyError(self._errors.get(coin, f"No features for {coin}"))
+        return entry
+
+    def entries(self):
+        return dict(self._entries)
+
+    def errors(self):
+        return dict(self._errors)
@@ -0,0 +1,116 @@
+# forecaster.py
+#
+# Background forecaster. The daily candles only change once per day, so the
+# latest 7-day forecast for every coin is computed ahead of time: at each
+# daily candle close (00:00 UTC) and whenever the dataset file or the scalers
+# change (a hot reload bumps the registry version), the latest feature window
+# of every coin is taken from the feature store and scored in one batch. The
+# result is published as an immutable snapshot that endpoints read in O(1).
+
+import threading
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+from feature_store import FeatureStore
+from inference import predict_batch
+from scaler_registry import get_registry
+
+POLL_INTERVAL_SEC = 60.0
+
+
+class ForecastSnapshot:
+    """Read-only forecast table for all coins."""
+
+    __slots__ = ("forecasts", "last_close", "changes", "errors",
+                 "generated_at", "data_version", "candle_date")
+
+    def __init__(self, forecasts, last_close, errors, data_version, candle_date):
+        self.forecasts = MappingProxyType({c: tuple(p) for c, p in forecasts.items()})
+        self.last_close = MappingProxyType(dict(last_close))
+        # Forecast change over the 7-day horizon, in percent of the last close
+        self.changes = MappingProxyType({
+            c: (p[-1] / last_close[c] - 1) * 100
+            for c, p in forecasts.items() if last_close.get(c)
+        })
+        self.errors = MappingProxyType(dict(errors))
+        self.generated_at = datetime.now(timezone.utc).isoformat()
+        self.data_version = data_version
+        self.candle_date = candle_date
+
+    def to_dict(self):
+        return {
+            "generated_at": self.generated_at,
+            "data_version": self.data_version,
+            "candle_date": self.candle_date,
+            "forecasts": {c: list(p) for c, p in self.forecasts.items()},
+            "errors": dict(self.errors),
+        }
+
+
+class Forecaster:
+    def __init__(self, model, coins, device='cpu', poll_interval=POLL_INTERVAL_SEC, store=None):
+        self.model = model
+        self.coins = list(coins)
+        self.store = store if store is not None else FeatureStore(coins)
+        self.device = device
+        self.poll_interval = poll_interval
+        self._snapshot = None
+        self._built_for = None          # (data_version, scaler version, UTC day) of the current snapshot
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self):
+        """The latest published snapshot, or None before the first build."""
+        return self._snapshot
+
+    def refresh(self, force=False):
+        """Rebuild the snapshot if the data, the scalers or the UTC day changed."""
+        with self._lock:
+            self.store.refresh()
+            key = (self.store.version, get_registry().version, datetime.now(timezone.utc).date())
+            if not force and key == self._built_for:
+                return False
+
+            entries = self.store.entries()
+            if not entries:
+                return False
+
+            windows = {c: e.window for c, e in entries.items()}
+            last_close = {c: e.last_close for c, e in entries.items()}
+            errors = self.store.errors()
+
+            forecasts = {}
+            coins = list(windows)
+            for coin, preds in zip(coins, predict_batch(self.model, coins, [windows[c] for c in coins], self.device)):
+                if isinstance(preds, dict):
+                    errors[coin] = preds["error"]
+                else:
+                    forecasts[coin] = preds
+
+            candle_date = max((e.candle_date for e in entries.values() if e.candle_date), default=None)
+            self._snapshot = ForecastSnapshot(forecasts, last_close, errors, key[0], candle_date)
+            self._built_for = key
+            print(f"Forecast snapshot rebuilt: {len(forecasts)} coins, data {key[0]}")
+            return True
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Forecast snapshot rebuild failed: {e}")
+            time.sleep(self._sleep_time())
+
+    def _sleep_time(self):
+        # Wake up right after the next daily candle close, or at the next poll
+        now = time.time()
+        to_close = 86400 - (now % 86400) + 1
+        return min(self.poll_interval, to_close)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="forecaster", daemon=True)
+            self._thread.start()
+        return self
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
+from history_store import sort_and_index
 import random
 
 DATASET_PATH = Path("../research/my_cypto_dataset.csv")
@@ -21,11 +22,14 @@ def generate_data():
     
     new_rows = []
     
-    coins = df['Coin'].unique()
+    # Sort once; every coin is then a contiguous slice
+    df, index = sort_and_index(df)
+    coins = list(index)
     print(f"Found {len(coins)} coins. Extending data to {TARGET_DATE.date()}...")
     
     for coin in coins:
-        coin_df = df[df['Coin'] == coin].sort_values('Date')
+        start, end = index[coin]
+        coin_df = df.iloc[start:end]
         if coin_df.empty:
             continue
             
@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+#
+# Multi-worker serving with one shared copy of the model. The app is imported
+# once in the master (preload_app), the checkpoint, scaler registry and
+# history data are loaded there, and the workers fork from it. Model tensors
+# sit in shared memory, so N workers cost roughly one model plus N small
+# per-process heaps. Linux/macOS only.
+#
+#   gunicorn app:app
+#
+# Check the memory footprint with `python measure_worker_rss.py`.
+
+import os
+
+bind = os.environ.get("ULTRONFX_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("ULTRONFX_WORKERS", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("ULTRONFX_PRELOAD", "1") == "1"
+timeout = 120
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import app
+    from inference import share_serving_memory
+
+    app.load_serving_state()
+    share_serving_memory(app.MODEL)
+    server.log.info("Serving state shared; forking %d workers", workers)
@@ -0,0 +1,251 @@
+# history_query.py
+#
+# Range queries and server-side downsampling over a coin's slice of the
+# history store. Everything works on the (dates, ohlcv) column arrays:
+#   daily     candles as stored
+#   weekly    OHLCV candles per ISO week (Monday start)
+#   monthly   OHLCV candles per calendar month
+#   lttb      original daily candles picked by Largest-Triangle-Three-Buckets
+#             on the close, for line charts that need the shape, not every day
+#
+# It also implements the delta sync behind /history/{coin}/sync: clients keep
+# an opaque cursor and fetch only candles appended or revised since then.
+
+import base64
+import hashlib
+import json
+
+import numpy as np
+
+from history_store import date_bounds
+
+RESOLUTIONS = ("daily", "weekly", "monthly", "lttb")
+DEFAULT_LTTB_POINTS = 500
+NS_PER_DAY = 86_400_000_000_000
+
+
+def _period_starts(dates, resolution):
+    """Period start (epoch ns) of every candle's week or month."""
+    days = dates // NS_PER_DAY
+    if resolution == "weekly":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return (days - (days + 3) % 7) * NS_PER_DAY
+    months = days.astype('datetime64[D]').astype('datetime64[M]')
+    return months.astype('datetime64[ns]').astype(np.int64)
+
+
+def _resample(dates, ohlcv, resolution, offsets):
+    """Candles per period within each [offsets[i], offsets[i+1]) segment."""
+    n = len(dates)
+    periods = _period_starts(np.asarray(dates), resolution)
+    new_bucket = np.r_[True, periods[1:] != periods[:-1]]
+    new_bucket[offsets[:-1][offsets[:-1] < n]] = True
+    starts = np.flatnonzero(new_bucket)
+    ends = np.r_[starts[1:], n]
+    o, h, l, c, v = ohlcv
+    out = np.stack([
+        o[starts],
+        np.maximum.reduceat(h, starts),
+        np.minimum.reduceat(l, starts),
+        c[ends - 1],
+        np.add.reduceat(v, starts, dtype=np.float64).astype(np.float32),
+    ])
+    return periods[starts], out, np.searchsorted(starts, offsets)
+
+
+def resample_ohlcv(dates, ohlcv, resolution):
+    """Aggregate sorted daily candles into weekly or monthly candles."""
+    if len(dates) == 0:
+        return dates, ohlcv
+    dates, ohlcv, _ = _resample(dates, ohlcv, resolution, np.array([0, len(dates)]))
+    return dates, ohlcv
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Row indices of the LTTB reduction of (x, y) to `threshold` points. Each
+    bucket depends on the point picked in the previous one, so buckets are
+    walked in order, but every bucket is scored with one vectorized step.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def check_resolution(resolution):
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+
+
+def downsample(dates, ohlcv, limit=None, resolution="daily"):
+    """Apply a resolution and point limit to sorted (dates, ohlcv) columns."""
+    check_resolution(resolution)
+    if resolution in ("weekly", "monthly"):
+        dates, ohlcv = resample_ohlcv(dates, ohlcv, resolution)
+    if resolution == "lttb":
+        idx = lttb_indices(dates, ohlcv[3], limit or DEFAULT_LTTB_POINTS)
+        dates, ohlcv = dates[idx], ohlcv[:, idx]
+    elif limit:
+        # Most recent `limit` candles
+        dates, ohlcv = dates[-limit:], ohlcv[:, -limit:]
+    return dates, ohlcv
+
+
+def query_history(store, coin, start=None, end=None, limit=None, resolution="daily"):
+    """(dates, ohlcv) of one coin for a date range, resolution and point limit."""
+    check_resolution(resolution)
+    lo, hi = store.row_range(coin, start, end)
+    return downsample(store.dates[lo:hi], store.ohlcv[:, lo:hi], limit, resolution)
+
+
+def query_batch(store, coins, start=None, end=None, limit=None, resolution="daily"):
+    """
+    Several coins in one gather from the store: (dates, ohlcv, offsets) with
+    coin i's points at [offsets[i]:offsets[i+1]]. Resampling and limits run
+    once over the concatenated columns; only LTTB goes coin by coin.
+    """
+    check_resolution(resolution)
+    spans = np.array([store.row_range(coin, start, end) for coin in coins], dtype=np.int64).reshape(-1, 2)
+    counts = spans[:, 1] - spans[:, 0]
+    offsets = np.r_[0, np.cumsum(counts)]
+    # Store rows of every requested candle, coin after coin
+    rows = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - spans[:, 0], counts)
+    dates, ohlcv = store.dates[rows], store.ohlcv[:, rows]
+
+    if len(dates) and resolution in ("weekly", "monthly"):
+        dates, ohlcv, offsets = _resample(dates, ohlcv, resolution, offsets)
+    if resolution == "lttb":
+        keep = np.concatenate([
+            a + lttb_indices(dates[a:b], ohlcv[3, a:b], limit or DEFAULT_LTTB_POINTS)
+            for a, b in zip(offsets[:-1], offsets[1:])
+        ] or [np.zeros(0, dtype=np.int64)])
+    elif limit:
+        # Most recent `limit` points of every coin
+        counts = np.diff(offsets)
+        keep = np.flatnonzero(np.arange(offsets[-1]) >= np.repeat(offsets[1:], counts) - limit)
+    else:
+        return dates, ohlcv, offsets
+    offsets = np.searchsorted(keep, offsets)
+    return dates[keep], ohlcv[:, keep], offsets
+
+
+def to_columns(dates, ohlcv):
+    """Column arrays: ISO dates plus one float array per OHLCV field."""
+    x = np.datetime_as_string(np.asarray(dates).view('datetime64[ns]'), unit='s')
+    o, h, l, c, v = np.ascontiguousarray(ohlcv)
+    return {"x": x.tolist(), "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+
+def to_table(dates, ohlcv):
+    """Typed columns for the binary formats: datetime64 dates and float32 OHLCV."""
+    o, h, l, c, v = np.ascontiguousarray(ohlcv)
+    return {"date": np.asarray(dates).view('datetime64[ns]'),
+            "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+
+def to_records(dates, ohlcv):
+    """ApexCharts rows: ISO date, [open, high, low, close], volume."""
+    x = np.datetime_as_string(np.asarray(dates).view('datetime64[ns]'), unit='s')
+    return [{"x": d, "y": y, "volume": v}
+            for d, y, v in zip(x.tolist(), ohlcv[:4].T.tolist(), ohlcv[4].tolist())]
+
+
+# ----------------------------------------------------
+# DELTA SYNC
+# ----------------------------------------------------
+# A cursor records the coin (c), the dataset version, the last candle date
+# the client holds (t) and digests of the coin's candles up to and including
+# t (h) and strictly before t (p). A cursor issued for another coin always
+# resyncs. Within one dataset version nothing changes, so the delta is empty.
+# After a dataset update the digests tell apart:
+#   h matches   candles were only appended          -> rows after t
+#   p matches   the last held candle was revised    -> rows from t on
+#   neither     older candles changed               -> full resync
+
+
+def _digest(dates, ohlcv):
+    h = hashlib.blake2b(digest_size=8)
+    h.update(np.ascontiguousarray(dates, dtype='<i8').tobytes())
+    h.update(np.ascontiguousarray(ohlcv, dtype='<f4').tobytes())
+    return h.hexdigest()
+
+
+def _candles_at(dates, t):
+    """(lo, hi) so that dates[lo:hi] are the candles at epoch ns `t`."""
+    return int(np.searchsorted(dates, t, 'left')), int(np.searchsorted(dates, t, 'right'))
+
+
+def encode_cursor(version, coin, dates, ohlcv):
+    """Cursor for a client that now holds all of a coin's (dates, ohlcv)."""
+    if len(dates) == 0:
+        state = {"c": coin, "v": version, "t": None, "h": _digest(dates, ohlcv), "p": None}
+    else:
+        state = {"c": coin, "v": version, "t": int(dates[-1]),
+                 "h": _digest(dates, ohlcv), "p": _digest(dates[:-1], ohlcv[:, :-1])}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Cursor state dict; ValueError if it is not one of ours."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not {"v", "t", "h", "p"} <= state.keys():
+            raise ValueError
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid history cursor")
+    return state
+
+
+def history_delta(store, coin, version, cursor=None, since=None):
+    """
+    Candles a client is missing, as (dates, ohlcv, resync, new_cursor).
+    `cursor` comes from a previous call; `since` is a plain timestamp for
+    clients without one (candles after it are sent). With neither, or when
+    the cursor cannot be continued (including a cursor of another coin),
+    resync is True and all candles are sent.
+    """
+    first, last = store.span(coin)
+    dates, ohlcv = store.dates[first:last], store.ohlcv[:, first:last]
+    if cursor is not None:
+        state = decode_cursor(cursor)
+        if state.get("c") != coin:
+            # Issued for another coin (or before cursors named one)
+            start = None
+        elif state["v"] == version:
+            # Same data as when the cursor was issued: nothing to send
+            return dates[:0], ohlcv[:, :0], False, cursor
+        else:
+            lo = hi = 0
+            if state["t"] is not None:
+                lo, hi = _candles_at(dates, state["t"])
+            if _digest(dates[:hi], ohlcv[:, :hi]) == state["h"]:
+                start = hi
+            elif state["p"] is not None and _digest(dates[:lo], ohlcv[:, :lo]) == state["p"]:
+                start = lo
+            else:
+                start = None
+    elif since is not None:
+        start = date_bounds(dates, end=since)[1]
+    else:
+        start = None
+
+    new_cursor = encode_cursor(version, coin, dates, ohlcv)
+    if start is None:
+        return dates, ohlcv, True, new_cursor
+    return dates[start:], ohlcv[:, start:], False, new_cursor
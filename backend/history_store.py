@@ -0,0 +1,231 @@
+# history_store.py
+#
+# Columnar, memory-mapped copy of research/my_cypto_dataset.csv. Rows are
+# sorted by (coin, date) so every coin's candles are one contiguous slice,
+# found through a coin -> (start, end) offset index; date ranges inside a
+# slice are two binary searches.
+# dates are int64 epoch nanoseconds and OHLCV are float32 columns. Opening
+# the store maps the file instead of parsing it, so it costs milliseconds
+# and forked workers share the pages through the OS page cache.
+#
+# File layout (little-endian):
+#   8 bytes   magic b"UFXHIST1"
+#   8 bytes   uint64 header length
+#   header    JSON: rows, coins, offsets, source_version, array offsets
+#   dates     int64[rows]                  (64-byte aligned)
+#   ohlcv     float32[5, rows]             (64-byte aligned, one row per column)
+#
+# Usage:
+#   python history_store.py                 # convert the CSV next to it
+
+import json
+import os
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"UFXHIST1"
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+ALIGN = 64
+
+
+def file_version(path):
+    """Fingerprint of a file; changes whenever it is rewritten."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    st = path.stat()
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ----------------------------------------------------
+# COIN INDEX
+# ----------------------------------------------------
+def coin_index(coins):
+    """{coin: (start, end)} over an array of coin labels grouped in sorted order."""
+    labels, starts = np.unique(coins, return_index=True)
+    ends = np.append(starts[1:], len(coins))
+    return {str(c): (int(s), int(e)) for c, s, e in zip(labels, starts, ends)}
+
+
+def sort_and_index(df):
+    """
+    Sort a Date/Coin frame by (coin, date) once and index it. Each coin's
+    candles are then df.iloc[start:end], oldest first, instead of a
+    df[df['Coin'] == coin] scan over every row per coin.
+    """
+    df = df.sort_values(['Coin', 'Date'], kind='mergesort').reset_index(drop=True)
+    return df, coin_index(df['Coin'].to_numpy())
+
+
+def _ns(value):
+    return np.datetime64(pd.Timestamp(value).tz_localize(None), 'ns')
+
+
+def date_bounds(dates, start=None, end=None):
+    """(lo, hi) so that dates[lo:hi] is start <= date <= end; dates must be sorted."""
+    dates = np.asarray(dates)
+    if dates.dtype == np.int64:
+        dates = dates.view('datetime64[ns]')
+    lo = int(np.searchsorted(dates, _ns(start), 'left')) if start is not None else 0
+    hi = int(np.searchsorted(dates, _ns(end), 'right')) if end is not None else len(dates)
+    return lo, max(lo, hi)
+
+
+# ----------------------------------------------------
+# CONVERTER
+# ----------------------------------------------------
+def convert_csv(csv_path, store_path):
+    """One-shot CSV -> store conversion. Rows with unparseable dates are dropped."""
+    csv_path, store_path = Path(csv_path), Path(store_path)
+    source_version = file_version(csv_path)
+
+    df = pd.read_csv(csv_path)
+    # Parse dates: Auto-detect format (handles both DD-MM-YYYY and YYYY-MM-DD)
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    bad = int(df['Date'].isna().sum())
+    if bad:
+        print(f"History store: dropping {bad} rows with unparseable dates")
+        df = df[df['Date'].notna()]
+    df, index = sort_and_index(df)
+    dates = df['Date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    ohlcv = np.ascontiguousarray(df[list(COLUMNS)].to_numpy(dtype=np.float32).T)
+
+    header = {
+        "rows": len(df),
+        "columns": list(COLUMNS),
+        "coins": list(index),
+        "offsets": [list(span) for span in index.values()],
+        "source_version": source_version,
+    }
+    # Array offsets depend on the header size, which depends on the offsets;
+    # reserve room for them first
+    header.update(dates_offset=0, ohlcv_offset=0)
+    base = _aligned(16 + len(json.dumps(header)) + 64)
+    header["dates_offset"] = base
+    header["ohlcv_offset"] = _aligned(base + dates.nbytes)
+    raw = json.dumps(header).encode()
+
+    tmp = store_path.with_name(f"{store_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(raw)) + raw)
+        f.write(b"\0" * (header["dates_offset"] - f.tell()))
+        f.write(dates.astype('<i8').tobytes())
+        f.write(b"\0" * (header["ohlcv_offset"] - f.tell()))
+        f.write(ohlcv.astype('<f4').tobytes())
+    # Atomic swap: readers see either the old or the new file, never a mix
+    os.replace(tmp, store_path)
+    return header
+
+
+# ----------------------------------------------------
+# READER
+# ----------------------------------------------------
+class HistoryStore:
+    """Read-only view over a store file; every accessor returns a slice, not a copy."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(8) != MAGIC:
+                raise ValueError(f"Not a history store: {self.path}")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+
+        self.rows = header["rows"]
+        self.columns = tuple(header["columns"])
+        self.coins = tuple(header["coins"])
+        self.offsets = {c: tuple(o) for c, o in zip(self.coins, header["offsets"])}
+        self.source_version = header["source_version"]
+        if self.rows:
+            self.dates = np.memmap(self.path, dtype='<i8', mode='r',
+                                   offset=header["dates_offset"], shape=(self.rows,))
+            self.ohlcv = np.memmap(self.path, dtype='<f4', mode='r',
+                                   offset=header["ohlcv_offset"], shape=(len(self.columns), self.rows))
+        else:
+            self.dates = np.zeros(0, dtype=np.int64)
+            self.ohlcv = np.zeros((len(self.columns), 0), dtype=np.float32)
+
+    def __contains__(self, coin):
+        return coin in self.offsets
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    def span(self, coin):
+        """(start, end) row range of a coin; KeyError if unknown."""
+        return self.offsets[coin]
+
+    def row_range(self, coin, start=None, end=None):
+        """(lo, hi) store rows of a coin's candles with start <= date <= end."""
+        first, last = self.span(coin)
+        lo, hi = date_bounds(self.dates[first:last], start, end)
+        return first + lo, first + hi
+
+    def coin_dates(self, coin, start=None, end=None):
+        lo, hi = self.row_range(coin, start, end)
+        return self.dates[lo:hi]
+
+    def coin_columns(self, coin, start=None, end=None):
+        """(5, n) float32 OHLCV view of a coin's candles, oldest first."""
+        lo, hi = self.row_range(coin, start, end)
+        return self.ohlcv[:, lo:hi]
+
+    def frame(self, coin, start=None, end=None):
+        """Date + OHLCV DataFrame of one coin, in float64 for indicator math."""
+        lo, hi = self.row_range(coin, start, end)
+        cols = self.ohlcv[:, lo:hi]
+        df = pd.DataFrame({name: cols[i].astype(np.float64) for i, name in enumerate(self.columns)})
+        df.insert(0, 'Date', np.asarray(self.dates[lo:hi]).view('datetime64[ns]'))
+        return df
+
+    def to_frame(self):
+        """Whole dataset as the DataFrame the CSV used to load into."""
+        df = pd.DataFrame({name: self.ohlcv[i].astype(np.float64) for i, name in enumerate(self.columns)})
+        df.insert(0, 'Date', np.asarray(self.dates).view('datetime64[ns]'))
+        df['Coin'] = np.repeat(np.array(self.coins, dtype=object),
+                               [e - s for s, e in (self.offsets[c] for c in self.coins)])
+        return df
+
+
+def open_store(csv_path, store_path):
+    """
+    Map the store, converting the CSV first if the store is missing or was
+    built from a different version of the CSV. Returns None without data.
+    """
+    csv_path, store_path = Path(csv_path), Path(store_path)
+    source_version = file_version(csv_path)
+    if store_path.exists():
+        store = HistoryStore(store_path)
+        if source_version is None or store.source_version == source_version:
+            return store
+    if source_version is None:
+        return None
+    t0 = time.perf_counter()
+    convert_csv(csv_path, store_path)
+    print(f"History store built from {csv_path.name} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return HistoryStore(store_path)
+
+
+if __name__ == "__main__":
+    from inference import DATASET_PATH, HISTORY_STORE_PATH
+
+    t0 = time.perf_counter()
+    header = convert_csv(DATASET_PATH, HISTORY_STORE_PATH)
+    t1 = time.perf_counter()
+    HistoryStore(HISTORY_STORE_PATH)
+    t2 = time.perf_counter()
+    print(f"Converted {header['rows']} rows / {len(header['coins'])} coins in {(t1 - t0) * 1000:.0f} ms "
+          f"-> {HISTORY_STORE_PATH} ({HISTORY_STORE_PATH.stat().st_size / 1e6:.1f} MB)")
+    print(f"Open (mmap): {(t2 - t1) * 1000:.2f} ms")
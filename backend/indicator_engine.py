@@ -0,0 +1,268 @@
+# indicator_engine.py
+#
+# Incremental version of LiveDataService.add_technical_indicators. Each coin
+# keeps constant-size state (EMA accumulators, rolling-mean ring buffers,
+# running OBV/ADI, RSI gain/loss windows), so a new daily candle updates all
+# 17 model features in O(1) instead of recomputing the whole frame.
+#
+# Rows match the batch computation over the same candles: the rolling means
+# repeat pandas' own update rules (compensated add/remove, sign clamps, runs
+# of equal values) and the EMAs pandas' adjust=False recursion. The batch
+# bfill/fillna(0) only looks forward, so it is applied when a window is read.
+#
+# The last candle can be revised (Binance's current-day kline changes until
+# the day closes); the state before it is kept to replay it.
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+FEATURES = (
+    'open', 'high', 'low', 'close', 'volume', 'ema_10', 'ema_21', 'ma_7', 'ma_30',
+    'momentum_rsi', 'volume_adi', 'volume_obv', 'volume_cmf', 'return_1', 'pct_change',
+    'day_of_week', 'is_weekend',
+)
+NAN = float('nan')
+
+
+def _div(a, b):
+    """IEEE division as pandas does it: x/0 -> +-inf, 0/0 -> nan."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+class RollingMean:
+    """Series.rolling(window).mean(), one value at a time."""
+
+    __slots__ = ("window", "values", "nobs", "sum", "comp_add", "comp_remove",
+                 "neg_ct", "same_run", "prev")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.sum = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.neg_ct = 0
+        self.same_run = 0
+        self.prev = NAN
+
+    def push(self, val):
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(val)
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum + y
+            self.comp_add = t - self.sum - y
+            self.sum = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct += 1
+            self.same_run = self.same_run + 1 if val == self.prev else 1
+            self.prev = val
+        return self.mean()
+
+    def _remove(self, val):
+        if val == val:
+            self.nobs -= 1
+            y = -val - self.comp_remove
+            t = self.sum + y
+            self.comp_remove = t - self.sum - y
+            self.sum = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct -= 1
+
+    def mean(self):
+        if self.nobs < self.window:
+            return NAN
+        if self.same_run >= self.nobs:
+            return self.prev
+        result = self.sum / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+    def copy(self):
+        other = RollingMean.__new__(RollingMean)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.values = deque(self.values)
+        return other
+
+
+class Ema:
+    """Series.ewm(span, adjust=False).mean(), one value at a time."""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span):
+        self.alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+        self.value = None
+
+    def push(self, val):
+        if self.value is None:
+            self.value = val
+        elif self.value != val:
+            old = 1.0 - self.alpha
+            self.value = (old * self.value + self.alpha * val) / (old + self.alpha)
+        return self.value
+
+    def copy(self):
+        other = Ema.__new__(Ema)
+        other.alpha, other.value = self.alpha, self.value
+        return other
+
+
+class IndicatorState:
+    """
+    Feature state of one coin. append() takes the next daily candle,
+    revise() replaces the last one; window() returns the latest rows with
+    the batch NaN filling applied.
+    """
+
+    def __init__(self, capacity=72):
+        self.capacity = capacity
+        self.rows = np.full((capacity, len(FEATURES)), np.nan)
+        self.count = 0
+        self.last_date = None
+        self._dates = np.zeros(capacity, dtype='datetime64[ns]')
+        self._prev_close = None
+        self._obv = 0.0
+        self._adi = 0.0
+        self._ema10, self._ema21 = Ema(10), Ema(21)
+        self._ma7, self._ma30 = RollingMean(7), RollingMean(30)
+        self._gain, self._loss = RollingMean(14), RollingMean(14)
+        self._cmf = RollingMean(20)
+        self._checkpoint = None
+
+    def _save(self):
+        return (self.count, self.last_date, self._prev_close, self._obv, self._adi,
+                self._ema10.copy(), self._ema21.copy(), self._ma7.copy(), self._ma30.copy(),
+                self._gain.copy(), self._loss.copy(), self._cmf.copy())
+
+    def _restore(self, saved):
+        (self.count, self.last_date, self._prev_close, self._obv, self._adi,
+         self._ema10, self._ema21, self._ma7, self._ma30,
+         self._gain, self._loss, self._cmf) = saved
+
+    def append(self, date, open_, high, low, close, volume):
+        """Add the next candle; returns its raw feature row (before NaN filling)."""
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Candle {date} is not after {self.last_date}")
+        self._checkpoint = self._save()
+        open_, high, low, close, volume = map(float, (open_, high, low, close, volume))
+
+        if self._prev_close is None:
+            delta = NAN
+            ret = NAN
+        else:
+            delta = close - self._prev_close
+            ret = _div(close, self._prev_close) - 1
+        # delta.where(delta > 0, 0) and -delta.where(delta < 0, 0): nan -> 0
+        gain = delta if delta > 0 else 0.0
+        loss = -(delta if delta < 0 else 0.0)
+        rsi = 100 - _div(100, 1 + _div(self._gain.push(gain), self._loss.push(loss)))
+
+        if delta == delta:
+            self._obv += float(np.sign(delta)) * volume
+        clv = _div((close - low) - (high - close), high - low)
+        self._adi += (0.0 if clv != clv else clv) * volume
+
+        dow = date.dayofweek
+        row = (open_, high, low, close, volume,
+               self._ema10.push(close), self._ema21.push(close),
+               self._ma7.push(close), self._ma30.push(close),
+               rsi, self._adi, self._obv, self._cmf.push(self._adi),
+               ret, ret, dow, int(dow in (5, 6)))
+
+        slot = self.count % self.capacity
+        self.rows[slot] = row
+        self._dates[slot] = date.to_datetime64()
+        self.count += 1
+        self.last_date = date
+        self._prev_close = close
+        return self.rows[slot]
+
+    def revise(self, date, open_, high, low, close, volume):
+        """Replace the last candle (same date, updated prices)."""
+        if self._checkpoint is None or pd.Timestamp(date) != self.last_date:
+            raise ValueError("Only the last candle can be revised")
+        self._restore(self._checkpoint)
+        return self.append(date, open_, high, low, close, volume)
+
+    def update(self, date, open_, high, low, close, volume):
+        """append() a newer candle, revise() the last one, ignore older ones."""
+        date = pd.Timestamp(date)
+        if self.last_date is None or date > self.last_date:
+            return self.append(date, open_, high, low, close, volume)
+        if date == self.last_date:
+            return self.revise(date, open_, high, low, close, volume)
+        return None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def window(self, n=None):
+        """(dates, features) of the latest n rows, oldest first, with bfill + fillna(0)."""
+        n = min(n or self.capacity, len(self))
+        idx = (np.arange(self.count - n, self.count)) % self.capacity
+        rows = self.rows[idx]
+        # Backward fill: each nan takes the next non-nan value below it
+        missing = np.isnan(rows)
+        if missing.any():
+            nxt = np.where(missing, n, np.arange(n)[:, None])
+            nxt = np.minimum.accumulate(nxt[::-1], axis=0)[::-1]
+            filled = np.vstack([rows, np.zeros((1, rows.shape[1]))])
+            rows = np.take_along_axis(filled, nxt, axis=0)
+        return self._dates[idx], rows
+
+    def frame(self, n=None):
+        """window() as a DataFrame: Date plus the 17 feature columns."""
+        dates, rows = self.window(n)
+        df = pd.DataFrame(rows, columns=FEATURES)
+        df.insert(0, 'Date', dates)
+        return df
+
+
+class IndicatorEngine:
+    """Per-coin IndicatorState objects, safe to feed from several threads."""
+
+    def __init__(self, capacity=72):
+        self.capacity = capacity
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def last_date(self, coin):
+        with self._lock:
+            state = self._states.get(coin)
+            return state.last_date if state is not None else None
+
+    def feed(self, coin, candles, reset=False):
+        """
+        Update a coin from a Date/Open/High/Low/Close/Volume frame sorted by
+        date (candles it already has are skipped, the last one revised).
+        Returns the coin's latest rows as a DataFrame.
+        """
+        cols = candles[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].itertuples(index=False)
+        with self._lock:
+            state = self._states.get(coin)
+            if state is None or reset:
+                state = self._states[coin] = IndicatorState(self.capacity)
+            for row in cols:
+                state.update(*row)
+            return state.frame()
+
+    def reset(self, coin=None):
+        with self._lock:
+            if coin is None:
+                self._states.clear()
+            else:
+                self._states.pop(coin, None)
@@ -3,8 +3,16 @@
 import torch
 import numpy as np
 import joblib
+import gc
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from model import TransformerV3
+from inference_model import TransformerV3Net, strip_positional_buffer
+from scaler_registry import get_registry
+from config import FORECAST_CACHE_SIZE, FORECAST_CACHE_TTL, INFER_WORKERS, TORCH_THREADS
+from executor import torch_threads_per_worker
 import random
 
 # Adjust model folder
@@ -38,40 +46,102 @@ def load_scaler(coin_name: str):
     return joblib.load(p)
 
 
-def load_model(seed_choice="best-v3-seed42", device='cpu'):
-    weight_file = MODEL_DIR / f"{seed_choice}_state_dict.pth"
-    if not weight_file.exists():
-        raise FileNotFoundError(f"Missing checkpoint {weight_file}")
-
-    coins = infer_coin_list_from_scalers()
-    num_series = len(coins)
-
-    model = TransformerV3(
+def load_weights(weight_file, num_series, device='cpu'):
+    """Build a TransformerV3Net in eval mode from a checkpoint file."""
+    model = TransformerV3Net(
         num_features=NUM_FEATURES,
         num_series=num_series,
         d_model=256,
         nhead=8,
         num_layers=4,
         pred_len=PRED_LEN,
-        lr=3e-4,
-        weight_decay=1e-5,
-        dropout=0.1
+        dropout=0.1,
+        max_len=SEQ_LEN
     )
 
-    sd = torch.load(weight_file, map_location=device)
+    try:
+        # Memory-mapped: tensors are paged in from the file on first use
+        # instead of being read and copied up front
+        sd = torch.load(weight_file, map_location=device, mmap=True)
+    except RuntimeError:
+        # Legacy (non-zipfile) checkpoints cannot be mapped
+        sd = torch.load(weight_file, map_location=device)
     if isinstance(sd, dict) and "state_dict" in sd:
         # remove Lightning prefix if exists
         sd = {k.replace("model.", ""): v for k, v in sd["state_dict"].items()}
 
-    model.load_state_dict(sd)
+    model.load_state_dict(strip_positional_buffer(sd), assign=True)
     model.to(device)
     model.eval()
+    return model
+
+
+def num_series(model):
+    """Rows of the series embedding; exported backends carry it as an attribute."""
+    n = getattr(model, "num_series", None)
+    if n is not None:
+        return n
+    return model.series_emb.num_embeddings
+
 
-    coin_to_id = {c: i for i, c in enumerate(sorted(coins))}
+def load_model(seed_choice="best-v3-seed42", device='cpu', backend="eager",
+               quantize=False, max_quant_error=0.02):
+    weight_file = MODEL_DIR / f"{seed_choice}_state_dict.pth"
+    if not weight_file.exists():
+        raise FileNotFoundError(f"Missing checkpoint {weight_file}")
+
+    registry = get_registry()
+    model = load_weights(weight_file, len(registry), device)
+    version = f"{seed_choice}@{weight_file.stat().st_mtime_ns:x}"
+
+    if quantize:
+        if backend != "eager" or device != 'cpu':
+            raise ValueError("int8 quantization requires the eager backend on CPU")
+        from quantization import gated_quantize
+        qmodel, _ = gated_quantize(model, max_quant_error)
+        if qmodel is not model:
+            model = qmodel
+            version = f"{version}+int8"
+
+    if backend != "eager":
+        from export_model import load_backend
+        # Same per-worker thread share the server gives torch
+        threads = TORCH_THREADS or torch_threads_per_worker(INFER_WORKERS)
+        model = load_backend(model, backend, weight_file, SEQ_LEN, NUM_FEATURES, device, threads)
+        version = f"{version}+{backend}"
+    model.model_version = version
+
+    coin_to_id = dict(registry.coin_to_id)
     id_to_coin = {v: k for k, v in coin_to_id.items()}
     return model, coin_to_id, id_to_coin
 
 
+def warm_up(model, batch_sizes, device='cpu'):
+    """Run throwaway forward passes so allocator and kernel setup costs are
+    paid before the first real request."""
+    with torch.no_grad():
+        for b in batch_sizes:
+            x = torch.zeros(b, SEQ_LEN, NUM_FEATURES, device=device)
+            s = torch.zeros(b, dtype=torch.long, device=device)
+            model(x, s)
+
+
+def share_serving_memory(model):
+    """
+    Load every read-only serving structure once and make it inheritable by
+    forked workers (gunicorn --preload). Model tensors move to shared
+    memory, the scaler registry is built and the history store mapped, and the
+    resulting objects are excluded from the cyclic GC so collections in the
+    workers do not touch (and copy) their pages.
+    """
+    if hasattr(model, "share_memory"):
+        model.share_memory()
+    get_registry()
+    load_history_store()
+    gc.collect()
+    gc.freeze()
+
+
 # ----------------------------------------------------
 # PREPROCESSING
 # ----------------------------------------------------
@@ -79,7 +149,8 @@ def preprocess_window(window):
     if isinstance(window, list):
         arr = np.array(window, dtype=float)
     else:
-        arr = np.array(window)
+        # Arrays (feature store, binary bodies) are used as-is, without a copy
+        arr = np.asarray(window)
 
     if arr.shape != (SEQ_LEN, NUM_FEATURES):
         raise ValueError(f"Expected window shape {(SEQ_LEN, NUM_FEATURES)}, got {arr.shape}")
@@ -87,47 +158,107 @@ def preprocess_window(window):
     return arr
 
 
+# ----------------------------------------------------
+# FORECAST CACHE
+# ----------------------------------------------------
+class ForecastCache:
+    """Bounded LRU cache of 7-day forecasts with an optional TTL."""
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, key, preds):
+        with self._lock:
+            self._data[key] = (tuple(preds), time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_sec": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+FORECAST_CACHE = ForecastCache(maxsize=FORECAST_CACHE_SIZE, ttl=FORECAST_CACHE_TTL or None)
+
+
+def forecast_cache_key(model, registry, coin, arr):
+    """(model version, scaler version, coin, digest of the window bytes)."""
+    digest = hashlib.blake2b(np.ascontiguousarray(arr, dtype=np.float64).tobytes(), digest_size=16).digest()
+    return (getattr(model, "model_version", id(model)), registry.version, coin, digest)
+
+
+# ----------------------------------------------------
+# SCALED FORWARD PASS
+# ----------------------------------------------------
+def _scale_inputs(arrs, series_ids, registry, device='cpu'):
+    """Model inputs for raw (B, SEQ_LEN, NUM_FEATURES) windows: the scaled
+    x, the series ids s and the normalizer that inverts the output."""
+    norm = registry.normalizer(device)
+    s = torch.tensor(series_ids, dtype=torch.long, device=device)
+    x = norm.normalize(torch.tensor(arrs, device=device), s)
+    return x, s, norm
+
+
+def _forward(model, arrs, series_ids, registry, device='cpu'):
+    """Scale (B, SEQ_LEN, NUM_FEATURES) windows, run the model once and
+    return the (B, PRED_LEN) close forecasts in price units. Scaling and
+    unscaling are batched torch ops over the series ids, so a mixed-coin
+    batch needs no per-coin work."""
+    x, s, norm = _scale_inputs(arrs, series_ids, registry, device)
+
+    with torch.no_grad():
+        out = norm.denormalize_close(model(x, s), s)   # B PRED_LEN
+
+    return out.cpu().numpy()
+
+
 # ----------------------------------------------------
 # 7-DAY PREDICTION (MAIN)
 # ----------------------------------------------------
 def predict_7day(model, coin_name, window, device='cpu'):
-    scaler = load_scaler(coin_name)
+    registry = get_registry()
+    series_id = registry.series_id(coin_name)
     arr = preprocess_window(window)
 
-    # Fix: Scaler expects 15 features, but we have 17.
-    # The last 2 are day_of_week and is_weekend, which are likely not scaled.
-    # We split, scale the first 15, and concat back.
-    if arr.shape[1] == 17 and scaler.n_features_in_ == 15:
-        feats_to_scale = arr[:, :15]
-        feats_static = arr[:, 15:]
-        scaled_part = scaler.transform(feats_to_scale)
-        arr_scaled = np.hstack([scaled_part, feats_static])
-    else:
-        # Fallback if shapes match or other case
-        arr_scaled = scaler.transform(arr)
+    key = forecast_cache_key(model, registry, coin_name, arr)
+    cached = FORECAST_CACHE.get(key)
+    if cached is not None:
+        return cached
 
-    x = torch.tensor(arr_scaled, dtype=torch.float32, device=device).unsqueeze(0)
-
-    coins = sorted(infer_coin_list_from_scalers())
-    series_id = coins.index(coin_name)
-    s = torch.tensor([series_id], dtype=torch.long, device=device)
-
-    with torch.no_grad():
-        out = model(x, s).cpu().numpy().reshape(-1)
-
-    close_idx = FEATURE_COLS.index("close")
-    
-    # Fix: Inverse transform also needs 15 features
-    if scaler.n_features_in_ == 15:
-        dummy = np.zeros((len(out), 15))
-        dummy[:, close_idx] = out
-        inv = scaler.inverse_transform(dummy)[:, close_idx]
-    else:
-        dummy = np.zeros((len(out), len(FEATURE_COLS)))
-        dummy[:, close_idx] = out
-        inv = scaler.inverse_transform(dummy)[:, close_idx]
-        
-    return inv.tolist()
+    preds = _forward(model, arr[None], [series_id], registry, device)[0].tolist()
+    FORECAST_CACHE.put(key, preds)
+    return preds
 
 
 # ----------------------------------------------------
@@ -139,21 +270,67 @@ def predict_today(model, coin_name, window, device='cpu'):
     return preds[0]
 
 
+# ----------------------------------------------------
+# BATCHED PREDICTION
+# ----------------------------------------------------
+def predict_batch(model, coins, windows, device='cpu'):
+    """
+    Run one forward pass over several (coin, window) pairs.
+
+    Returns a list aligned with `coins`; each entry is either the 7-day
+    forecast or {"error": ...} for pairs that could not be scored.
+    """
+    results = [None] * len(coins)
+    registry = get_registry()
+
+    # Rows are validated one by one so a bad coin or window only fails itself,
+    # never the whole stacked forward pass
+    max_series = num_series(model)
+    rows, arrs, sids, keys = [], [], [], []
+    for i, (coin, window) in enumerate(zip(coins, windows)):
+        try:
+            sid = registry.series_id(coin)
+            if not 0 <= sid < max_series:
+                raise ValueError(f"Series id {sid} of {coin} is outside the model's {max_series} series")
+            arr = preprocess_window(window)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+            continue
+        key = forecast_cache_key(model, registry, coin, arr)
+        cached = FORECAST_CACHE.get(key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        rows.append(i)
+        arrs.append(arr)
+        sids.append(sid)
+        keys.append(key)
+
+    if not rows:
+        return results
+
+    inv = _forward(model, np.stack(arrs), sids, registry, device)
+    for row, key, preds in zip(rows, keys, inv.tolist()):
+        FORECAST_CACHE.put(key, preds)
+        results[row] = preds
+    return results
+
+
 # ----------------------------------------------------
 # BULK PREDICTION
 # ----------------------------------------------------
 def predict_bulk(model, coins, windows, device='cpu'):
     results = {}
+    batch_coins = []
     for coin in coins:
         if coin not in windows:
             results[coin] = {"error": "No window provided"}
             continue
-        try:
-            preds = predict_7day(model, coin, windows[coin], device)
-            results[coin] = preds
-        except Exception as e:
-            results[coin] = {"error": str(e)}
-    return results
+        batch_coins.append(coin)
+
+    preds = predict_batch(model, batch_coins, [windows[c] for c in batch_coins], device)
+    results.update(zip(batch_coins, preds))
+    return {coin: results[coin] for coin in coins}
 
 
 # ----------------------------------------------------
@@ -161,77 +338,185 @@ def predict_bulk(model, coins, windows, device='cpu'):
 # ----------------------------------------------------
 def predict_all(model, all_coins, device='cpu'):
     """WARNING: uses zero window (demo only)"""
-    out = {}
-    zero = np.zeros((SEQ_LEN, NUM_FEATURES)).tolist()
-
-    for coin in all_coins:
-        try:
-            out[coin] = predict_7day(model, coin, zero, device)
-        except Exception as e:
-            out[coin] = {"error": str(e)}
-    return out
+    zero = np.zeros((SEQ_LEN, NUM_FEATURES))
+    preds = predict_batch(model, all_coins, [zero] * len(all_coins), device)
+    return dict(zip(all_coins, preds))
 
 
 # ----------------------------------------------------
 # HISTORY (REAL DATA FROM CSV)
 # ----------------------------------------------------
+# The CSV is converted once into a columnar memory-mapped store
+# (history_store.py); requests and feature builders read coin slices from
+# it. The data version is still the fingerprint of the CSV.
 import pandas as pd
 from datetime import datetime
+from history_store import file_version, open_store
+from history_query import check_resolution, history_delta, query_batch, query_history, to_columns, to_records, to_table
+from response_codec import JSON_TYPE, dumps_json, encode_columns, etag_matches
 
 DATASET_PATH = Path(__file__).resolve().parents[1] / "research" / "my_cypto_dataset.csv"
+HISTORY_STORE_PATH = DATASET_PATH.with_suffix(".hist")
+_HISTORY_STORE = None
 _HISTORY_CACHE = None
+_HISTORY_VERSION = None
 _COIN_CACHE = {}
+_STORE_LOCK = threading.Lock()
+
+def dataset_version():
+    """Fingerprint of the dataset file; changes whenever it is rewritten."""
+    return file_version(DATASET_PATH)
+
+def load_history_store():
+    """The mapped history store, or None if there is no dataset."""
+    global _HISTORY_STORE, _HISTORY_VERSION
+    if _HISTORY_STORE is not None:
+        return _HISTORY_STORE
+    with _STORE_LOCK:
+        if _HISTORY_STORE is None:
+            store = open_store(DATASET_PATH, HISTORY_STORE_PATH)
+            if store is None:
+                print(f"Warning: Dataset not found at {DATASET_PATH}")
+                return None
+            _HISTORY_STORE, _HISTORY_VERSION = store, store.source_version
+        return _HISTORY_STORE
 
 def load_history_data():
+    """Whole dataset as a DataFrame (Date, OHLCV, Coin), for scripts and
+    offline tools. Serving code reads coin slices from load_history_store."""
     global _HISTORY_CACHE
     if _HISTORY_CACHE is not None:
         return _HISTORY_CACHE
-    
-    if not DATASET_PATH.exists():
-        print(f"Warning: Dataset not found at {DATASET_PATH}")
+    store = load_history_store()
+    if store is None:
         return pd.DataFrame()
+    _HISTORY_CACHE = store.to_frame()
+    return _HISTORY_CACHE
+
+def refresh_history_data():
+    """Reload the dataset if the file changed since it was cached.
+
+    Meant for background jobs; request handlers keep reading the cache.
+    Returns True when a new version was loaded.
+    """
+    global _HISTORY_STORE, _HISTORY_VERSION, _HISTORY_CACHE, _COIN_CACHE
+    if _HISTORY_STORE is not None and dataset_version() in (None, _HISTORY_VERSION):
+        return False
+    with _STORE_LOCK:
+        store = open_store(DATASET_PATH, HISTORY_STORE_PATH)
+        if store is None:
+            return False
+        _HISTORY_STORE, _HISTORY_VERSION = store, store.source_version
+        _HISTORY_CACHE = None
+        _COIN_CACHE = {}
+    return True
+
+def history_version():
+    """Version of the dataset currently held in memory."""
+    load_history_store()
+    return _HISTORY_VERSION
+
+def get_history(coin, start=None, end=None, limit=None, resolution="daily"):
+    """
+    Return historical OHLCV data for the coin, optionally restricted to
+    start <= date <= end, resampled (weekly / monthly / lttb) and capped to
+    `limit` points. Raises ValueError for an unknown resolution or bad date.
+    """
+    store = load_history_store()
+    if store is None or store.empty:
+        return {"error": "Dataset not available"}
+    if coin not in store:
+        return {"error": f"No history found for {coin}"}
 
-    df = pd.read_csv(DATASET_PATH)
-    # Parse dates: Auto-detect format (handles both DD-MM-YYYY and YYYY-MM-DD)
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    _HISTORY_CACHE = df
-    return df
+    # Format for ApexCharts, built column-wise from the store slice
+    dates, ohlcv = query_history(store, coin, start, end, limit, resolution)
+    return {
+        "coin": coin,
+        "data": to_records(dates, ohlcv)
+    }
 
-def get_history(coin):
-    """Return historical OHLCV data for the coin."""
-    df = load_history_data()
-    if df.empty:
+def get_history_batch(coins, start=None, end=None, limit=None, resolution="daily"):
+    """
+    History of several coins as one columnar payload: shared column arrays
+    (x, open, high, low, close, volume) with coin i's points at
+    [offsets[i]:offsets[i+1]]. Coins without data are left out of `coins`.
+    Raises ValueError for an unknown resolution or bad date.
+    """
+    store = load_history_store()
+    if store is None or store.empty:
         return {"error": "Dataset not available"}
 
-    # Check coin cache
-    if coin in _COIN_CACHE:
-        return _COIN_CACHE[coin]
+    coins = [coin for coin in coins if coin in store]
+    dates, ohlcv, offsets = query_batch(store, coins, start, end, limit, resolution)
+    return {
+        "coins": coins,
+        "offsets": offsets,
+        "columns": to_columns(dates, ohlcv)
+    }
 
-    # Filter by coin
-    coin_df = df[df['Coin'] == coin].copy()
-    
-    if coin_df.empty:
+def history_etag(coin, version=None, query=()):
+    """Strong ETag of a coin's history: changes only with the dataset version
+    (and with the range / resolution / format of the query)."""
+    version = version or history_version()
+    digest = hashlib.blake2b(f"{version}:{coin}:{query}".encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+def get_history_payload(coin, start=None, end=None, limit=None, resolution="daily", media_type=JSON_TYPE,
+                        if_none_match=None):
+    """
+    (bytes, etag) of a coin's history in `media_type`: the get_history JSON,
+    or Arrow / MessagePack columns (date, open, high, low, close, volume).
+    The full history is encoded once per dataset version and format; ranged
+    or downsampled queries are small and encoded per request. The etag only
+    depends on the version, coin, query and format, so when `if_none_match`
+    already matches it nothing is encoded and the bytes are None. The etag
+    is None for error payloads, which are always JSON.
+    """
+    query = (start, end, limit, resolution)
+    full = query == (None, None, None, "daily")
+    cached = _COIN_CACHE.get((coin, media_type)) if full else None
+    if cached is not None:
+        return (None, cached[1]) if etag_matches(if_none_match, cached[1]) else cached
+
+    check_resolution(resolution)
+    store = load_history_store()
+    if store is None or store.empty or coin not in store:
+        return dumps_json(get_history(coin)), None
+
+    version = history_version()
+    etag_query = (() if full else query) + (() if media_type == JSON_TYPE else (media_type,))
+    etag = history_etag(coin, version, etag_query)
+    if etag_matches(if_none_match, etag):
+        return None, etag
+
+    if media_type == JSON_TYPE:
+        payload = dumps_json(get_history(coin, start, end, limit, resolution))
+    else:
+        payload = encode_columns(to_table(*query_history(store, coin, *query)), media_type)
+    if full and version == _HISTORY_VERSION:
+        # Not cached if the data was refreshed while encoding
+        _COIN_CACHE[(coin, media_type)] = (payload, etag)
+    return payload, etag
+
+def get_history_delta(coin, cursor=None, since=None):
+    """
+    Candles appended or revised since a cursor (or a `since` timestamp),
+    with the cursor to send next time. `resync` is True when the client must
+    replace its copy with `data`. Raises ValueError for a bad cursor.
+    """
+    store = load_history_store()
+    if store is None or store.empty:
+        return {"error": "Dataset not available"}
+    if coin not in store:
         return {"error": f"No history found for {coin}"}
 
-    # Sort by date
-    coin_df = coin_df.sort_values('Date')
-
-    # Format for ApexCharts (Timestamp in ms, or ISO string)
-    # Vectorized approach is much faster than iterrows
-    # We need to rename columns to match expected format
-    temp_df = coin_df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].copy()
-    temp_df['x'] = temp_df['Date'].apply(lambda d: d.isoformat())
-    temp_df['y'] = temp_df[['Open', 'High', 'Low', 'Close']].values.tolist()
-    
-    # Rename Volume to lowercase volume
-    data = temp_df[['x', 'y', 'Volume']].rename(columns={'Volume': 'volume'}).to_dict('records')
-    
-    result = {
+    dates, ohlcv, resync, next_cursor = history_delta(store, coin, history_version(), cursor, since)
+    return {
         "coin": coin,
-        "data": data
+        "cursor": next_cursor,
+        "resync": resync,
+        "data": to_records(dates, ohlcv)
     }
-    _COIN_CACHE[coin] = result
-    return result
 
 
 # ----------------------------------------------------
@@ -245,8 +530,14 @@ def get_risk_score(coin):
 # ----------------------------------------------------
 # TRENDING COINS
 # ----------------------------------------------------
-def get_trending(model, coins):
-    """Demo trending coins."""
+def get_trending(model, coins, snapshot=None):
+    """Top movers by forecast 7-day change; random demo data without a snapshot."""
+    if snapshot is not None and snapshot.changes:
+        ranked = sorted(snapshot.changes, key=snapshot.changes.get, reverse=True)
+        return {
+            "top_gainers": ranked[:5],
+            "top_losers": ranked[::-1][:5]
+        }
     return {
         "top_gainers": random.sample(coins, 5),
         "top_losers": random.sample(coins, 5)
@@ -265,6 +556,14 @@ def compare_two(model, req):
 # ----------------------------------------------------
 # STATISTICS
 # ----------------------------------------------------
+def num_parameters(model):
+    """Parameter count; exported backends carry it as an attribute."""
+    n = getattr(model, "num_parameters", None)
+    if n is not None:
+        return n
+    return sum(p.numel() for p in model.parameters())
+
+
 def get_stats(model, coins):
     """Fake model quality stats."""
     return {
@@ -272,7 +571,7 @@ def get_stats(model, coins):
         "seq_len": SEQ_LEN,
         "num_features": NUM_FEATURES,
         "prediction_len": PRED_LEN,
-        "model_parameters": sum(p.numel() for p in model.parameters()),
+        "model_parameters": num_parameters(model),
     }
 
 
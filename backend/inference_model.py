@@ -0,0 +1,119 @@
+# inference_model.py
+#
+# Serving variant of TransformerV3 as a plain nn.Module. It has the same
+# layers and state_dict keys as the Lightning class in model.py, but no
+# pytorch_lightning import and no training-only state (loss_fn, optimizer
+# config, saved hyperparameters). Training keeps using model.TransformerV3.
+#
+# SeriesNormalizer and ScaledForecastNet move the per-coin RobustScaler into
+# the torch graph: raw feature windows in, close prices out, for any mix of
+# coins in one batch.
+
+import math
+import torch
+import torch.nn as nn
+
+
+class PositionalEncoding(nn.Module):
+    """Sinusoidal encoding sized for the serving window, not 10,000 positions.
+
+    The table is recomputed on construction, so the buffer is not part of
+    the state_dict; checkpoints that carry `pos_enc.pe` load fine after
+    `strip_positional_buffer`.
+    """
+
+    def __init__(self, d_model, max_len=72):
+        super().__init__()
+        pe = torch.zeros(max_len, d_model)
+        pos = torch.arange(0, max_len).unsqueeze(1).float()
+        div = torch.exp(torch.arange(0, d_model, 2).float() * (-math.log(10000.0) / d_model))
+        pe[:, 0::2] = torch.sin(pos * div)
+        pe[:, 1::2] = torch.cos(pos * div)
+        self.register_buffer("pe", pe.unsqueeze(0), persistent=False)  # (1, max_len, d)
+
+    def forward(self, x):
+        return x + self.pe[:, :x.size(1), :]
+
+
+class TransformerV3Net(nn.Module):
+    def __init__(self, num_features, num_series, d_model=256, nhead=8,
+                 num_layers=4, pred_len=7, dropout=0.1, max_len=72):
+        super().__init__()
+        self.input_proj = nn.Linear(num_features, d_model)
+        self.pos_enc = PositionalEncoding(d_model, max_len)
+
+        encoder_layer = nn.TransformerEncoderLayer(
+            d_model=d_model,
+            nhead=nhead,
+            dim_feedforward=1024,
+            dropout=dropout,
+            batch_first=True
+        )
+        self.transformer = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
+
+        self.series_emb = nn.Embedding(num_series, 64)
+
+        self.head = nn.Sequential(
+            nn.Linear(d_model + 64, d_model // 2),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(d_model // 2, pred_len)
+        )
+
+    def forward(self, x, s):
+        # x: (B, seq_len, num_features)
+        # s: (B,) long tensor of series ids
+        x = self.input_proj(x)            # B S d
+        x = self.pos_enc(x)
+        x = self.transformer(x)           # B S d
+        x_last = x[:, -1, :]
+        s_emb = self.series_emb(s)
+        out = torch.cat([x_last, s_emb], dim=1)
+        out = self.head(out)
+        return out
+
+
+class SeriesNormalizer(nn.Module):
+    """
+    Per-coin RobustScaler parameters as (num_series, num_features) tensors
+    indexed by series id, like an embedding table. Kept in float64 so the
+    result matches scaling the window with NumPy before the float32 cast.
+    """
+
+    def __init__(self, centers, scales, close_idx):
+        super().__init__()
+        self.register_buffer("center", torch.tensor(centers, dtype=torch.float64))
+        self.register_buffer("scale", torch.tensor(scales, dtype=torch.float64))
+        self.close_idx = close_idx
+
+    def normalize(self, x, s):
+        # x: (B, seq_len, num_features) raw features -> float32 model input
+        x = (x.to(torch.float64) - self.center[s].unsqueeze(1)) / self.scale[s].unsqueeze(1)
+        return x.to(torch.float32)
+
+    def denormalize_close(self, y, s):
+        # y: (..., B, pred_len) scaled close forecasts -> float64 prices
+        scale = self.scale[s, self.close_idx].unsqueeze(-1)
+        center = self.center[s, self.close_idx].unsqueeze(-1)
+        return y.to(torch.float64) * scale + center
+
+    def forward(self, x, s):
+        return self.normalize(x, s)
+
+
+class ScaledForecastNet(nn.Module):
+    """A forecaster wrapped with its normalizer: raw window in, prices out."""
+
+    def __init__(self, core, normalizer):
+        super().__init__()
+        self.core = core
+        self.normalizer = normalizer
+
+    def forward(self, x, s):
+        y = self.core(self.normalizer.normalize(x, s), s)
+        return self.normalizer.denormalize_close(y, s)
+
+
+def strip_positional_buffer(state_dict):
+    """Drop the persisted 10,000-row positional table from a training checkpoint."""
+    return {k: v for k, v in state_dict.items() if k != "pos_enc.pe"}
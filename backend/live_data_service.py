@@ -4,8 +4,16 @@ import numpy as np
 import datetime
 import time
 
+from indicator_engine import IndicatorEngine
+
+# Candles fetched per incremental LIVE window update: the open day plus the
+# previous ones, enough to bridge a missed poll or two
+LIVE_DELTA_CANDLES = 3
+
 class LiveDataService:
     def __init__(self):
+        # Per-coin incremental feature state for fetch_live_window
+        self.indicators = IndicatorEngine()
         self.binance_base_url = "https://api.binance.com/api/v3"
         self.coingecko_base_url = "https://api.coingecko.com/api/v3"
         
@@ -96,39 +104,43 @@ class LiveDataService:
         }, inplace=True)
         
         # Fill NaNs (caused by rolling windows)
-        df.fillna(method='bfill', inplace=True)
+        df.bfill(inplace=True)
         df.fillna(0, inplace=True)
         
         return df
 
+    def _fetch_klines(self, symbol, limit):
+        """Last `limit` daily Binance candles as a Date/OHLCV DataFrame."""
+        pair = self.symbol_map.get(symbol.upper(), f"{symbol.upper()}USDT")
+        url = f"{self.binance_base_url}/klines?symbol={pair}&interval=1d&limit={limit}"
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        
+        processed_data = []
+        for candle in data:
+            timestamp = candle[0]
+            date = datetime.datetime.fromtimestamp(timestamp / 1000)
+            processed_data.append({
+                "Date": date,
+                "Open": float(candle[1]),
+                "High": float(candle[2]),
+                "Low": float(candle[3]),
+                "Close": float(candle[4]),
+                "Volume": float(candle[5])
+            })
+        
+        return pd.DataFrame(processed_data)
+
     def fetch_live_history(self, symbol, days=72):
         """
         Fetch historical candles from Binance and compute features.
         Returns a DataFrame with all 17 features.
         """
-        pair = self.symbol_map.get(symbol.upper(), f"{symbol.upper()}USDT")
         try:
             # Fetch extra days to allow for rolling window calculations (e.g. MA30 needs 30 prior days)
             fetch_limit = days + 40 
-            url = f"{self.binance_base_url}/klines?symbol={pair}&interval=1d&limit={fetch_limit}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            processed_data = []
-            for candle in data:
-                timestamp = candle[0]
-                date = datetime.datetime.fromtimestamp(timestamp / 1000)
-                processed_data.append({
-                    "Date": date,
-                    "Open": float(candle[1]),
-                    "High": float(candle[2]),
-                    "Low": float(candle[3]),
-                    "Close": float(candle[4]),
-                    "Volume": float(candle[5])
-                })
-            
-            df = pd.DataFrame(processed_data)
+            df = self._fetch_klines(symbol, fetch_limit)
             
             # Compute features
             df = self.add_technical_indicators(df)
@@ -140,6 +152,26 @@ class LiveDataService:
             print(f"Error fetching live history for {symbol}: {e}")
             return pd.DataFrame()
 
+    def fetch_live_window(self, symbol):
+        """
+        Latest 72 feature rows (Date + the 17 model features), kept up to
+        date incrementally. The first call per coin fetches 112 candles and
+        seeds the indicator engine; later calls fetch only the last few
+        candles and feed them in (new ones appended, the open day revised).
+        A gap since the last call reseeds the coin.
+        """
+        try:
+            last = self.indicators.last_date(symbol)
+            if last is not None:
+                recent = self._fetch_klines(symbol, LIVE_DELTA_CANDLES)
+                if not recent.empty and recent['Date'].iloc[0] <= last:
+                    return self.indicators.feed(symbol, recent)
+            candles = self._fetch_klines(symbol, self.indicators.capacity + 40)
+            return self.indicators.feed(symbol, candles, reset=True)
+        except Exception as e:
+            print(f"Error fetching live window for {symbol}: {e}")
+            return pd.DataFrame()
+
     def fetch_market_overview(self):
         """Fetch global market stats from CoinGecko."""
         try:
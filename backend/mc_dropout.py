@@ -0,0 +1,87 @@
+# mc_dropout.py
+#
+# Monte-Carlo dropout forecast intervals. A twin of the serving model shares
+# its weight tensors but stays in training mode, so the encoder and head
+# dropout layers are active. The request window is replicated K times and
+# scored in a single batched forward pass; the spread of the K samples gives
+# per-day percentile bands.
+
+import copy
+import threading
+
+import numpy as np
+import torch
+
+from inference import _scale_inputs, preprocess_window
+from inference_model import TransformerV3Net
+from scaler_registry import get_registry
+
+PERCENTILES = (5, 50, 95)
+
+_TWINS = {}
+_TWIN_LOCK = threading.Lock()
+
+
+def _dropout_twin(model):
+    """Train-mode copy of `model` whose parameters are the same tensors."""
+    twin = _TWINS.get(id(model))
+    if twin is not None:
+        return twin
+    with _TWIN_LOCK:
+        if id(model) not in _TWINS:
+            twin = copy.deepcopy(model)
+            twin.load_state_dict(model.state_dict(), assign=True)
+            twin.train()
+            _TWINS[id(model)] = twin
+        return _TWINS[id(model)]
+
+
+def supports_intervals(model):
+    """Eager fp32 TransformerV3 only: the dynamic-int8 model is also a
+    TransformerV3Net, but its packed Linear weights cannot be shared by the
+    dropout copy."""
+    if not isinstance(model, TransformerV3Net):
+        return False
+    return not any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in model.modules())
+
+
+def predict_intervals(model, coin_name, window, samples, device='cpu'):
+    """Per-day percentile bands from `samples` dropout draws in one batch."""
+    if not supports_intervals(model):
+        raise ValueError("Forecast intervals require the eager fp32 model")
+
+    registry = get_registry()
+    series_id = registry.series_id(coin_name)
+    arr = preprocess_window(window)
+
+    x, s, norm = _scale_inputs(arr[None], [series_id], registry, device)
+    x = x.expand(samples, -1, -1)
+    s = s.expand(samples)
+
+    with torch.no_grad():
+        out = _dropout_twin(model)(x, s)                    # K PRED_LEN
+    prices = norm.denormalize_close(out, s).cpu().numpy()   # K PRED_LEN
+
+    bands = np.percentile(prices, PERCENTILES, axis=0)
+    result = {"samples": samples}
+    result.update((f"p{p}", band.tolist()) for p, band in zip(PERCENTILES, bands))
+    return result
+
+
+if __name__ == "__main__":
+    # Latency vs K: one batched pass should grow well below linearly
+    import time
+    from inference import NUM_FEATURES, SEQ_LEN, load_model
+
+    model, c2i, _ = load_model()
+    coin = next(iter(c2i))
+    window = np.zeros((SEQ_LEN, NUM_FEATURES))
+    predict_intervals(model, coin, window, 1)
+    base = None
+    for k in (1, 8, 32, 64, 128):
+        t0 = time.perf_counter()
+        for _ in range(5):
+            predict_intervals(model, coin, window, k)
+        ms = (time.perf_counter() - t0) * 200
+        base = base or ms
+        print(f"K={k:<4} {ms:8.1f} ms  ({ms / base:5.1f}x of K=1)")
@@ -0,0 +1,98 @@
+# measure_worker_rss.py
+#
+# Total memory of a gunicorn deployment as the worker count grows, with and
+# without the shared preload mode from gunicorn.conf.py. RSS counts shared
+# pages once per process; PSS splits them between the processes sharing
+# them, so the PSS total is the real footprint. Linux only (/proc).
+#
+# Usage:
+#   python measure_worker_rss.py --workers 1 2 4
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def _children(pid):
+    out = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            out.append(int(entry))
+    return out
+
+
+def _mem_kb(pid):
+    rss = pss = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def _wait_ready(port, workers, master, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2):
+                pass
+            if len(_children(master)) >= workers:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def measure(workers, preload, port, timeout):
+    env = dict(os.environ,
+               ULTRONFX_WORKERS=str(workers),
+               ULTRONFX_PRELOAD="1" if preload else "0",
+               ULTRONFX_BIND=f"127.0.0.1:{port}")
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app"], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not _wait_ready(port, workers, proc.pid, timeout):
+            raise RuntimeError(f"server with {workers} workers did not become ready")
+        time.sleep(2)  # let background services settle
+        pids = [proc.pid] + _children(proc.pid)
+        mem = [_mem_kb(p) for p in pids]
+        return sum(r for r, _ in mem) / 1024, sum(p for _, p in mem) / 1024
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Total gunicorn memory vs worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=180)
+    args = parser.parse_args()
+
+    print(f"{'Workers':>7} | {'Mode':<10} | {'Total RSS (MB)':>14} | {'Total PSS (MB)':>14}")
+    print("-" * 56)
+    for n in args.workers:
+        for preload in (False, True):
+            rss, pss = measure(n, preload, args.port, args.timeout)
+            mode = "shared" if preload else "per-worker"
+            print(f"{n:>7} | {mode:<10} | {rss:>14.1f} | {pss:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
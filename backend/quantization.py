@@ -0,0 +1,117 @@
+# quantization.py
+#
+# Opt-in dynamic int8 serving mode for TransformerV3, plus the accuracy gate
+# that decides whether it may be activated. The gate compares int8 and fp32
+# 7-day forecasts on held-out windows from research/my_cypto_dataset.csv.
+#
+# Usage:
+#   python quantization.py              # evaluation report
+
+import io
+
+import torch
+import torch.nn as nn
+
+# Held-out windows: the most recent share of each coin's history
+HOLDOUT_FRAC = 0.15
+HOLDOUT_WINDOWS_PER_COIN = 16
+
+
+def quantize_model(model):
+    """
+    Return an int8 copy of the model: every nn.Linear (input projection,
+    encoder feed-forward blocks and head) gets dynamically quantized weights.
+    """
+    qmodel = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    # The fused encoder fast path reads linear.weight as a tensor, which
+    # quantized Linear modules don't expose; a no-op pre-hook makes the
+    # encoder take the regular path instead.
+    for mod in [qmodel.transformer, *qmodel.transformer.layers]:
+        mod.register_forward_pre_hook(_no_fast_path)
+    qmodel.eval()
+    return qmodel
+
+
+def _no_fast_path(module, args):
+    return None
+
+
+def weight_bytes(model):
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell()
+
+
+def evaluate_quantization(fp32, int8, x, s, y=None):
+    """
+    Compare int8 against fp32 forecasts on scaled windows.
+
+    Errors are in scaled units, i.e. fractions of each coin's close IQR, so
+    one threshold applies across coins of very different price levels.
+    """
+    with torch.no_grad():
+        ref = fp32(x, s)
+        out = int8(x, s)
+    drift = (out - ref).abs()
+    report = {
+        "windows": int(x.shape[0]),
+        "mean_abs_drift": float(drift.mean()),
+        "max_abs_drift": float(drift.max()),
+        "fp32_weight_bytes": weight_bytes(fp32),
+        "int8_weight_bytes": weight_bytes(int8),
+    }
+    if y is not None:
+        report["fp32_mae"] = float((ref - y).abs().mean())
+        report["int8_mae"] = float((out - y).abs().mean())
+    return report
+
+
+def holdout_windows():
+    from export_model import sample_real_windows
+    from inference import PRED_LEN
+    return sample_real_windows(HOLDOUT_WINDOWS_PER_COIN, horizon=PRED_LEN, tail_frac=HOLDOUT_FRAC)
+
+
+def gated_quantize(model, max_error):
+    """
+    Quantize `model` if the held-out mean drift stays within `max_error`.
+    Returns (model_to_serve, report); the fp32 model is kept on refusal.
+    """
+    int8 = quantize_model(model)
+    try:
+        x, s, y = holdout_windows()
+    except FileNotFoundError as e:
+        print(f"Quantization refused: cannot evaluate without held-out data ({e})")
+        return model, None
+
+    report = evaluate_quantization(model, int8, x, s, y)
+    if report["mean_abs_drift"] > max_error:
+        print(f"Quantization refused: mean drift {report['mean_abs_drift']:.4f} > {max_error}")
+        return model, report
+
+    print(f"Quantized int8 model active: mean drift {report['mean_abs_drift']:.4f}, "
+          f"weights {report['fp32_weight_bytes'] / 1e6:.1f} MB -> {report['int8_weight_bytes'] / 1e6:.1f} MB")
+    return int8, report
+
+
+if __name__ == "__main__":
+    import time
+    from inference import load_model
+    from config import QUANT_MAX_ERROR
+
+    fp32, _, _ = load_model()
+    int8 = quantize_model(fp32)
+    x, s, y = holdout_windows()
+    report = evaluate_quantization(fp32, int8, x, s, y)
+    for k, v in report.items():
+        print(f"{k:<20} {v}")
+
+    with torch.no_grad():
+        for name, m in (("fp32", fp32), ("int8", int8)):
+            m(x, s)
+            t0 = time.perf_counter()
+            m(x, s)
+            print(f"{name} latency ({x.shape[0]} windows): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    status = "PASS" if report["mean_abs_drift"] <= QUANT_MAX_ERROR else "FAIL"
+    print(f"Gate (mean drift <= {QUANT_MAX_ERROR}): {status}")
@@ -0,0 +1,153 @@
+# response_codec.py
+#
+# Response encoding helpers. JSON bodies that are cached or large are
+# encoded once to bytes here instead of by FastAPI's jsonable_encoder on
+# every request. orjson is used when installed (pip install orjson), with
+# the standard library as the fallback; both emit the same compact JSON,
+# with NaN and infinities written as null.
+#
+# Table-shaped responses can also be sent as columns, picked from the
+# Accept header:
+#   application/vnd.apache.arrow.stream   Arrow IPC stream (pip install pyarrow)
+#   application/msgpack                   MessagePack map of columns (pip install msgpack)
+# Numeric columns go out as their NumPy buffers. In MessagePack each one is
+# {"nd": true, "type": dtype, "kind": "", "shape": [n], "data": bytes}, the
+# msgpack-numpy layout, so np.frombuffer(data, type) restores it.
+# Export endpoints also stream rows as text/csv or application/x-ndjson
+# (see stream_export.py).
+
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = "application/json"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_TYPE = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+CSV_TYPE = "text/csv"
+NDJSON_TYPE = "application/x-ndjson"
+NDJSON_ALIASES = (NDJSON_TYPE, "application/jsonl", "application/jsonlines")
+COLUMNAR_TYPES = (ARROW_TYPE, MSGPACK_TYPE)
+STREAM_TYPES = (CSV_TYPE, NDJSON_TYPE)
+
+
+def _jsonable(obj):
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj):
+    """Copy of a JSON-able structure with NaN / +-inf floats replaced by None."""
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _finite(obj.tolist())
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    return obj
+
+
+def dumps_json(obj):
+    """Compact JSON bytes. NumPy arrays are written as lists, non-finite floats as null."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        return json.dumps(obj, separators=(",", ":"), allow_nan=False, default=_jsonable).encode()
+    except ValueError:
+        # Only payloads with NaN / inf pay for the extra pass
+        return json.dumps(_finite(obj), separators=(",", ":"), allow_nan=False).encode()
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value covers `etag` (RFC 9110 weak comparison)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+# ----------------------------------------------------
+# COLUMNAR FORMATS
+# ----------------------------------------------------
+def _accept_entries(accept):
+    """Media types of an Accept header, highest q first (ties keep order)."""
+    entries = []
+    for i, part in enumerate(accept.split(",")):
+        media, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            entries.append((-q, i, media.strip().lower()))
+    return [media for _, _, media in sorted(entries)]
+
+
+def negotiate(accept, offered=COLUMNAR_TYPES):
+    """
+    Response format for an Accept header among the endpoint's `offered`
+    types: Arrow or MessagePack when asked for and installed, CSV / NDJSON
+    streams, JSON otherwise (including for */* and no header).
+    """
+    for media in _accept_entries(accept or ""):
+        if media == ARROW_TYPE and pa is not None and ARROW_TYPE in offered:
+            return ARROW_TYPE
+        if media in MSGPACK_ALIASES and msgpack is not None and MSGPACK_TYPE in offered:
+            return MSGPACK_TYPE
+        if media == CSV_TYPE and CSV_TYPE in offered:
+            return CSV_TYPE
+        if media in NDJSON_ALIASES and NDJSON_TYPE in offered:
+            return NDJSON_TYPE
+        if media in (JSON_TYPE, "application/*", "*/*"):
+            return JSON_TYPE
+    return JSON_TYPE
+
+
+def _msgpack_column(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biufM":
+        values = np.ascontiguousarray(values)
+        return {"nd": True, "type": values.dtype.str, "kind": "",
+                "shape": list(values.shape), "data": values.tobytes()}
+    return list(values)
+
+
+def encode_columns(columns, media_type):
+    """
+    Bytes of a {name: column} table in `media_type`. Columns are NumPy
+    arrays (numeric or datetime64) or lists of str / None, all one length.
+    JSON gets a map of column lists.
+    """
+    if media_type == ARROW_TYPE:
+        table = pa.table({name: pa.array(values) for name, values in columns.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if media_type == MSGPACK_TYPE:
+        return msgpack.packb({name: _msgpack_column(v) for name, v in columns.items()})
+    return dumps_json({name: np.datetime_as_string(v, unit='s').tolist() if isinstance(v, np.ndarray) and v.dtype.kind == "M"
+                       else v for name, v in columns.items()})
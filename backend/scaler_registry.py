@@ -0,0 +1,188 @@
+# scaler_registry.py
+#
+# Process-wide coin/scaler registry. All per-coin RobustScaler parameters are
+# loaded once and held as stacked NumPy arrays, so request threads only ever
+# index into memory. A background watcher rebuilds the registry when a
+# *_scaler.pkl file is added or changed and swaps it in atomically.
+# Series ids are fixed by the first build, which also sizes the model's
+# series embedding; reloads never renumber coins.
+#
+# The same parameters are exposed as a torch SeriesNormalizer, so windows for
+# any mix of coins are scaled (and forecasts unscaled) in one batched op.
+
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from inference_model import SeriesNormalizer
+
+SCALER_DIR = Path(__file__).resolve().parent / "crypto_model_package"
+NUM_FEATURES = 17
+CLOSE_IDX = 3                     # position of 'close' in the 17 model features
+WATCH_INTERVAL_SEC = 5.0
+
+
+def _scaler_params(scaler):
+    """Return (center, scale) vectors over all 17 features.
+
+    Columns the scaler does not cover (day_of_week, is_weekend) get an
+    identity transform so the whole window can be scaled in one step.
+    """
+    n = scaler.n_features_in_
+    center = np.zeros(NUM_FEATURES)
+    scale = np.ones(NUM_FEATURES)
+    if getattr(scaler, "center_", None) is not None:
+        center[:n] = scaler.center_
+    if getattr(scaler, "scale_", None) is not None:
+        scale[:n] = scaler.scale_
+    return center, scale
+
+
+def _scan(scaler_dir):
+    """Fingerprint of the scaler files: {filename: (mtime_ns, size)}."""
+    out = {}
+    for p in scaler_dir.glob("*_scaler.pkl"):
+        st = p.stat()
+        out[p.name] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+class ScalerRegistry:
+    """Immutable snapshot of every coin's series id and scaler parameters.
+
+    `num_series` is the number of series ids the loaded model has; coins are
+    only ever given ids below it.
+    """
+
+    def __init__(self, coins, centers, scales, fingerprint, version, num_series=None):
+        self.coins = tuple(coins)
+        self.num_series = num_series if num_series is not None else len(self.coins)
+        self.coin_to_id = {c: i for i, c in enumerate(self.coins)}
+        self.centers = centers            # (num_series, NUM_FEATURES)
+        self.scales = scales              # (num_series, NUM_FEATURES)
+        self.fingerprint = fingerprint
+        self.version = version
+        self.centers.setflags(write=False)
+        self.scales.setflags(write=False)
+        self._normalizers = {}
+
+    def __contains__(self, coin):
+        return coin in self.coin_to_id
+
+    def __len__(self):
+        return len(self.coins)
+
+    def series_id(self, coin):
+        if coin not in self.coin_to_id:
+            raise FileNotFoundError(f"Scaler not found: {SCALER_DIR / f'{coin}_scaler.pkl'}")
+        return self.coin_to_id[coin]
+
+    def params(self, series_ids):
+        """Gather (center, scale) rows for an array of series ids."""
+        return self.centers[series_ids], self.scales[series_ids]
+
+    def normalizer(self, device='cpu'):
+        """SeriesNormalizer for this snapshot, built once per device."""
+        norm = self._normalizers.get(str(device))
+        if norm is None:
+            norm = SeriesNormalizer(self.centers, self.scales, CLOSE_IDX).to(device)
+            self._normalizers[str(device)] = norm
+        return norm
+
+
+def build_registry(scaler_dir=SCALER_DIR, version=1, previous=None):
+    """
+    Registry of the scalers in `scaler_dir`. The first build numbers coins
+    in sorted order. With `previous`, ids stay as they were: known coins only
+    get their new center/scale, new coins are appended while their id stays
+    below previous.num_series and refused otherwise, and coins whose file is
+    gone keep their last parameters.
+    """
+    fingerprint = _scan(scaler_dir)
+    found = sorted(name.replace("_scaler.pkl", "") for name in fingerprint)
+    if previous is None:
+        coins, num_series = found, len(found)
+    else:
+        coins, num_series = list(previous.coins), previous.num_series
+        for coin in found:
+            if coin in previous:
+                continue
+            if len(coins) < num_series:
+                coins.append(coin)
+            else:
+                print(f"Scaler registry: ignoring {coin}, the model has no series id for it "
+                      f"({num_series} series)")
+        gone = set(previous.coins).difference(found)
+        if gone:
+            print(f"Scaler registry: scaler files missing for {sorted(gone)}, keeping their parameters")
+
+    centers = np.zeros((len(coins), NUM_FEATURES))
+    scales = np.ones((len(coins), NUM_FEATURES))
+    present = set(found)
+    for i, coin in enumerate(coins):
+        if coin in present:
+            centers[i], scales[i] = _scaler_params(joblib.load(scaler_dir / f"{coin}_scaler.pkl"))
+        else:
+            centers[i], scales[i] = previous.centers[i], previous.scales[i]
+
+    return ScalerRegistry(coins, centers, scales, fingerprint, version, num_series)
+
+
+# ----------------------------------------------------
+# GLOBAL REGISTRY + HOT RELOAD
+# ----------------------------------------------------
+_REGISTRY = None
+_BUILD_LOCK = threading.Lock()
+_WATCHER = None
+
+
+def get_registry():
+    """Return the current registry (built on first use, normally at startup)."""
+    reg = _REGISTRY
+    if reg is not None:
+        return reg
+    with _BUILD_LOCK:
+        if _REGISTRY is None:
+            _swap(build_registry(SCALER_DIR))
+        return _REGISTRY
+
+
+def _swap(reg):
+    global _REGISTRY
+    _REGISTRY = reg
+
+
+def reload_registry(force=False):
+    """Rebuild the registry if the scaler files changed. Returns True on swap."""
+    current = get_registry()
+    if not force and _scan(SCALER_DIR) == current.fingerprint:
+        return False
+    with _BUILD_LOCK:
+        new = build_registry(SCALER_DIR, version=current.version + 1, previous=current)
+        _swap(new)
+    print(f"Scaler registry reloaded (v{new.version}, {len(new)} coins)")
+    return True
+
+
+def _watch_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            reload_registry()
+        except Exception as e:
+            # A half-written pickle is picked up again on the next poll
+            print(f"Scaler registry reload failed: {e}")
+
+
+def start_registry_watcher(interval=WATCH_INTERVAL_SEC):
+    """Start the background thread that polls SCALER_DIR for changes."""
+    global _WATCHER
+    get_registry()
+    if _WATCHER is None or not _WATCHER.is_alive():
+        _WATCHER = threading.Thread(target=_watch_loop, args=(interval,),
+                                    name="scaler-registry-watcher", daemon=True)
+        _WATCHER.start()
+    return _WATCHER
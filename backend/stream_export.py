@@ -0,0 +1,68 @@
+# stream_export.py
+#
+# Chunked CSV / NDJSON exports. Rows are read from the history store (or an
+# indicator frame already in memory) EXPORT_CHUNK_ROWS at a time, encoded
+# with pandas' C writers and yielded as bytes for a StreamingResponse, so the
+# first chunk goes out immediately and only one encoded chunk is held at a
+# time; store reads stay lazy, so candle exports never load the whole range.
+
+import numpy as np
+import pandas as pd
+
+from history_store import COLUMNS
+from response_codec import CSV_TYPE
+
+# Exported column names of the store's OHLCV arrays (same as the indicator frame)
+HISTORY_FIELDS = tuple(c.lower() for c in COLUMNS)
+
+
+def _chunk_frame(columns, a, b):
+    return pd.DataFrame({name: np.asarray(values[a:b]) for name, values in columns.items()})
+
+
+def array_chunks(columns, chunk_rows):
+    """DataFrames of `chunk_rows` rows over equal-length column arrays (memmap views stay lazy)."""
+    n = len(next(iter(columns.values()), ()))
+    for a in range(0, n, chunk_rows):
+        yield _chunk_frame(columns, a, a + chunk_rows)
+
+
+def frame_chunks(df, chunk_rows):
+    for a in range(0, len(df), chunk_rows):
+        yield df.iloc[a:a + chunk_rows]
+
+
+def history_chunks(store, coins, start=None, end=None, chunk_rows=1000):
+    """Daily candles of several coins, coin after coin, with a coin column."""
+    columns = {"date": store.dates.view('datetime64[ns]'), **dict(zip(HISTORY_FIELDS, store.ohlcv))}
+    for coin in coins:
+        lo, hi = store.row_range(coin, start, end)
+        for a in range(lo, hi, chunk_rows):
+            chunk = _chunk_frame(columns, a, min(a + chunk_rows, hi))
+            chunk.insert(1, "coin", coin)
+            yield chunk
+
+
+def _format_dates(df):
+    out = df.copy(deep=False)
+    for name in out.columns:
+        values = out[name].to_numpy()
+        if values.dtype.kind == "M":
+            out[name] = np.datetime_as_string(values, unit='D')
+    return out
+
+
+def encode_rows(chunks, media_type):
+    """Bytes of each chunk as CSV (one header line first) or NDJSON; dates as YYYY-MM-DD."""
+    header = True
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk = _format_dates(chunk)
+        if media_type == CSV_TYPE:
+            yield chunk.to_csv(index=False, header=header).encode()
+            header = False
+        else:
+            # Older pandas leaves out the final newline
+            lines = chunk.to_json(orient="records", lines=True, double_precision=15)
+            yield (lines if lines.endswith("\n") else lines + "\n").encode()
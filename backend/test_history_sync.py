@@ -0,0 +1,112 @@
+# test_history_sync.py
+#
+# Delta sync of history_query.history_delta on small synthetic stores:
+#   1. same coin and dataset version -> empty delta, same cursor
+#   2. appended candles / a revised last candle -> only those rows
+#   3. older candles changed -> full resync
+#   4. a cursor issued for another coin (or without a coin) -> full resync
+#
+# Usage:
+#   python -m pytest test_history_sync.py
+#   python test_history_sync.py
+
+import base64
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from history_query import encode_cursor, history_delta
+from history_store import HistoryStore, convert_csv
+
+COINS = ("coin_Bitcoin", "coin_EOS")
+
+
+def candles(days=30, seed=0):
+    """Date/Coin/OHLCV frame with `days` daily candles per coin."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i, coin in enumerate(COINS):
+        close = 100.0 * (i + 1) + rng.normal(size=days).cumsum()
+        frames.append(pd.DataFrame({
+            "Date": pd.date_range("2024-01-01", periods=days, freq="D"), "Coin": coin,
+            "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+            "Volume": rng.uniform(1, 10, days),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_store(directory, df, name):
+    csv_path = Path(directory) / f"{name}.csv"
+    df.to_csv(csv_path, index=False)
+    convert_csv(csv_path, csv_path.with_suffix(".hist"))
+    return HistoryStore(csv_path.with_suffix(".hist"))
+
+
+def sync(store, coin, version, cursor=None):
+    dates, ohlcv, resync, cursor = history_delta(store, coin, version, cursor)
+    return len(dates), resync, cursor
+
+
+def test_same_version(tmp_path):
+    store = make_store(tmp_path, candles(), "v1")
+    rows, resync, cursor = sync(store, "coin_Bitcoin", "v1")
+    assert (rows, resync) == (30, True)
+    rows, resync, again = sync(store, "coin_Bitcoin", "v1", cursor)
+    assert (rows, resync, again) == (0, False, cursor)
+
+
+def test_append_and_revise(tmp_path):
+    df = candles(days=32)
+    old = make_store(tmp_path, df[df["Date"] < "2024-01-31"], "v1")
+    _, _, cursor = sync(old, "coin_Bitcoin", "v1")
+
+    new = make_store(tmp_path, df, "v2")
+    rows, resync, _ = sync(new, "coin_Bitcoin", "v2", cursor)
+    assert (rows, resync) == (2, False)
+
+    revised = df.copy()
+    revised.loc[revised["Date"] == "2024-01-30", "Close"] += 5
+    new = make_store(tmp_path, revised, "v3")
+    rows, resync, _ = sync(new, "coin_Bitcoin", "v3", cursor)
+    assert (rows, resync) == (3, False)
+
+
+def test_older_candles_changed(tmp_path):
+    df = candles()
+    _, _, cursor = sync(make_store(tmp_path, df, "v1"), "coin_Bitcoin", "v1")
+    df.loc[df["Date"] == "2024-01-05", "Close"] += 5
+    rows, resync, _ = sync(make_store(tmp_path, df, "v2"), "coin_Bitcoin", "v2", cursor)
+    assert (rows, resync) == (30, True)
+
+
+def test_cursor_of_another_coin(tmp_path):
+    store = make_store(tmp_path, candles(), "v1")
+    _, _, cursor = sync(store, "coin_Bitcoin", "v1")
+    # Same dataset version: an unchecked cursor would answer "nothing new"
+    rows, resync, eos_cursor = sync(store, "coin_EOS", "v1", cursor)
+    assert (rows, resync) == (30, True)
+    assert eos_cursor != cursor
+    assert sync(store, "coin_EOS", "v1", eos_cursor)[:2] == (0, False)
+
+
+def test_cursor_without_coin(tmp_path):
+    store = make_store(tmp_path, candles(), "v1")
+    first, last = store.span("coin_Bitcoin")
+    cursor = encode_cursor("v1", "coin_Bitcoin", store.dates[first:last], store.ohlcv[:, first:last])
+    state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    del state["c"]
+    legacy = base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+    assert sync(store, "coin_Bitcoin", "v1", legacy)[:2] == (30, True)
+
+
+if __name__ == "__main__":
+    tests = [test_same_version, test_append_and_revise, test_older_candles_changed,
+             test_cursor_of_another_coin, test_cursor_without_coin]
+    for test in tests:
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+        print(f"✅ {test.__name__}")
+    print("ALL PASSED")
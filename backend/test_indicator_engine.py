@@ -0,0 +1,131 @@
+# test_indicator_engine.py
+#
+# Parity of the incremental indicator engine with the batch
+# LiveDataService.add_technical_indicators:
+#   1. every coin of the dataset fed candle by candle, all rows compared
+#   2. the 72-row window after each of the last 40 candles (what LIVE serves)
+#   3. revising the last candle equals appending the final values directly
+#   4. edge cases: flat prices (RSI 0/0), high == low candles, zero volume
+#
+# Usage:
+#   python -m pytest test_indicator_engine.py
+#   python test_indicator_engine.py
+#
+# 1 and 2 need the dataset and are skipped without it; 3 and 4 use
+# synthetic candles.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicator_engine import FEATURES, IndicatorEngine, IndicatorState
+from inference import FEATURE_COLS, SEQ_LEN, load_history_store
+from live_data_service import live_service
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+@pytest.fixture(scope="module")
+def store():
+    store = load_history_store()
+    if store is None or store.empty:
+        pytest.skip("Dataset not available")
+    return store
+
+
+def batch(candles):
+    return live_service.add_technical_indicators(candles.copy())
+
+
+def feed(candles, capacity):
+    state = IndicatorState(capacity)
+    for row in candles[['Date'] + OHLCV].itertuples(index=False):
+        state.append(*row)
+    return state
+
+
+def synthetic_candles(n=150, seed=0):
+    """Random-walk daily candles with a spread, for tests without the dataset."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(rng.normal(0, 0.03, n).cumsum())
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=n, freq="D"),
+                         "Open": open_,
+                         "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n)),
+                         "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n)),
+                         "Close": close, "Volume": rng.uniform(1e3, 1e6, n)})
+
+
+def compare(name, got, want):
+    """Asserts bit-for-bit equality (NaN == NaN) and names the worst column if not."""
+    got = np.asarray(got, dtype=float)
+    want = want[list(FEATURES)].to_numpy(dtype=float)
+    same = (got == want) | (np.isnan(got) & np.isnan(want))
+    if same.all():
+        return
+    diff = np.abs(np.nan_to_num(got - want, nan=np.inf))
+    col = int(np.argmax(diff.max(axis=0)))
+    rel = diff.max(axis=0)[col] / max(np.abs(want[:, col]).max(), 1e-300)
+    raise AssertionError(f"{name}: {int((~same).sum())} values differ, worst {FEATURES[col]} (rel {rel:.2e})")
+
+
+def test_feature_order():
+    assert list(FEATURES) == FEATURE_COLS, "engine feature order differs from the model's"
+
+
+def test_full_history(store):
+    for coin in store.coins:
+        candles = store.frame(coin)
+        state = feed(candles, len(candles))
+        compare(coin, state.window()[1], batch(candles))
+
+
+def test_live_windows(store, steps=40):
+    for coin in store.coins[:5]:
+        candles = store.frame(coin)
+        start = len(candles) - steps
+        state = feed(candles.iloc[:start], SEQ_LEN)
+        for end in range(start, len(candles)):
+            state.append(*candles.iloc[end][['Date'] + OHLCV])
+            want = batch(candles.iloc[:end + 1]).tail(SEQ_LEN)
+            compare(f"{coin}@{end}", state.window()[1], want)
+
+
+def test_revise():
+    candles = synthetic_candles()
+    engine = IndicatorEngine(SEQ_LEN)
+    engine.feed("c", candles.iloc[:-1])
+    # Intraday versions of the last candle, then the final one
+    last = candles.iloc[[-1]].copy()
+    for factor in (0.97, 1.05, 1.0):
+        tick = last.copy()
+        tick[['High', 'Low', 'Close', 'Volume']] *= factor
+        got = engine.feed("c", pd.concat([candles.iloc[[-2]], tick]))
+    want = batch(candles).tail(SEQ_LEN)
+    compare("revise", got[list(FEATURES)].to_numpy(), want)
+    assert (got['Date'].to_numpy() == want['Date'].to_numpy()).all()
+
+
+def test_edge_cases():
+    """Flat prices (RSI 0/0), high == low candles and zero volume."""
+    n = 120
+    dates = pd.date_range("2025-01-01", periods=n, freq="D")
+    close = np.r_[np.full(40, 1.0), np.linspace(1, 2, 40), np.full(40, 2.0)]
+    candles = pd.DataFrame({"Date": dates, "Open": close, "High": close, "Low": close,
+                            "Close": close, "Volume": np.r_[np.zeros(20), np.full(n - 20, 5.0)]})
+    state = feed(candles, n)
+    compare("edge", state.window()[1], batch(candles))
+
+
+if __name__ == "__main__":
+    test_feature_order()
+    test_revise()
+    test_edge_cases()
+    print("✅ Feature order, revised candles and edge cases match batch")
+    history = load_history_store()
+    if history is None or history.empty:
+        raise SystemExit("Dataset not available, skipping the full-history tests")
+    test_full_history(history)
+    test_live_windows(history)
+    print(f"✅ Full history and rolling {SEQ_LEN}-row windows match batch on {len(history.coins)} coins")
+    print("ALL PASSED")
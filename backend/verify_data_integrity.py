@@ -1,5 +1,6 @@
 import pandas as pd
 from pathlib import Path
+from history_store import sort_and_index, date_bounds
 
 DATASET_PATH = Path("../research/my_cypto_dataset.csv")
 
@@ -7,6 +8,8 @@ def check_integrity():
     print(f"Loading {DATASET_PATH}...")
     df = pd.read_csv(DATASET_PATH)
     df['Date'] = pd.to_datetime(df['Date'])
+    # Sort once; every coin is then a contiguous slice
+    df, index = sort_and_index(df)
     
     print(f"Total Rows: {len(df)}")
     
@@ -27,13 +30,12 @@ def check_integrity():
         
     # 3. Check for Gaps
     print("\nChecking for date gaps (Real Data Period: 2021-2025)...")
-    coins = df['Coin'].unique()
-    for coin in coins:
-        coin_df = df[df['Coin'] == coin].sort_values('Date')
+    for coin, (start, end) in index.items():
+        coin_df = df.iloc[start:end]
         
         # Filter for the "Real" period we just fetched (approx July 2021 to Nov 2025)
-        mask = (coin_df['Date'] >= '2021-07-07') & (coin_df['Date'] <= '2025-11-22')
-        real_df = coin_df[mask]
+        lo, hi = date_bounds(coin_df['Date'].to_numpy(), '2021-07-07', '2025-11-22')
+        real_df = coin_df.iloc[lo:hi]
         
         if real_df.empty:
             continue
@@ -52,10 +54,12 @@ def check_integrity():
     print("✅ Gap check complete (Warnings above if any).")
 
     # 4. Check Latest Real Data Point
-    btc_df = df[df['Coin'] == 'coin_Bitcoin']
+    start, end = index['coin_Bitcoin']
+    btc_df = df.iloc[start:end]
     # Filter for dates <= Today (Nov 23)
     # We fetched up to Nov 22 inclusive usually with yfinance end=Nov 23
-    recent = btc_df[btc_df['Date'] <= '2025-11-23'].iloc[-1]
+    _, hi = date_bounds(btc_df['Date'].to_numpy(), end='2025-11-23')
+    recent = btc_df.iloc[hi - 1]
     print(f"\nLatest Bitcoin Data Point (Dataset):")
     print(f"Date: {recent['Date']}")
     print(f"Close: ${recent['Close']:.2f}")
@@ -18,13 +18,31 @@ def verify_all_predictions():
         
         success_count = 0
         
+        # Get the last 72 days of every coin in one request (columnar payload,
+        # LIVE or static as the server's data mode says)
+        req = urllib.request.Request(
+            f"{BASE_URL}/history/batch",
+            data=json.dumps({"coins": coins, "limit": 72}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as hist_res:
+            batch = json.loads(hist_res.read().decode())
+        cols, offsets = batch['columns'], batch['offsets']
+        history = {
+            c: [{"x": cols['x'][k], "y": [cols['open'][k], cols['high'][k], cols['low'][k], cols['close'][k]],
+                 "volume": cols['volume'][k]} for k in range(offsets[i], offsets[i + 1])]
+            for i, c in enumerate(batch['coins'])
+        }
+        
         for coin in coins:
-            # Get History to check last date
-            with urllib.request.urlopen(f"{BASE_URL}/history/{coin}") as hist_res:
-                hist_data = json.loads(hist_res.read().decode())
-                last_point = hist_data['data'][-1]
-                last_date = last_point['x'].split('T')[0]
-                last_price = last_point['y'][3] # Close price
+            # History to check last date (coins without data are left out of the batch)
+            hist_data = {"data": history.get(coin, [])}
+            if not hist_data['data']:
+                print(f"{coin:<20} | {'NO DATA':<10} | {'-':<12} | {'-':<15}")
+                continue
+            last_point = hist_data['data'][-1]
+            last_date = last_point['x'].split('T')[0]
+            last_price = last_point['y'][3] # Close price
                 
             # Get Prediction
             # We use a dummy window for the API call if needed, but the /predict endpoint usually handles it.
@@ -0,0 +1,83 @@
+# window_codec.py
+#
+# Binary request bodies for the predict endpoints. Besides the JSON
+# `window: [[...], ...]` format, clients may send the feature windows as raw
+# little-endian float32 bytes or as a .npy file. Both are wrapped with
+# np.frombuffer without copying or creating per-value Python floats.
+#
+#   Content-Type: application/octet-stream    raw float32, C order
+#   Content-Type: application/x-npy           NumPy .npy (float32 or float64)
+
+import io
+
+import numpy as np
+
+from inference import NUM_FEATURES, SEQ_LEN
+
+RAW_TYPES = ("application/octet-stream", "application/x-float32")
+NPY_TYPES = ("application/x-npy", "application/vnd.numpy")
+JSON_TYPES = ("application/json", "")
+
+WINDOW_SHAPE = (SEQ_LEN, NUM_FEATURES)
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def media_type(content_type):
+    """'application/x-npy; charset=...' -> 'application/x-npy'."""
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def is_binary(content_type):
+    return media_type(content_type) in RAW_TYPES + NPY_TYPES
+
+
+def _npy_view(body):
+    """Read-only view of the array in a .npy body; only the header is parsed."""
+    buf = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(buf)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(buf)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(buf)
+    except ValueError as e:
+        raise ValueError(f"Invalid .npy body: {e}")
+    if fortran:
+        raise ValueError("Fortran-ordered .npy arrays are not supported")
+    if dtype not in (np.dtype("<f4"), np.dtype("<f8")):
+        raise ValueError(f"Expected little-endian float32/float64 .npy, got {dtype}")
+    count = int(np.prod(shape))
+    if len(body) - buf.tell() != count * dtype.itemsize:
+        raise ValueError(".npy payload size does not match its header")
+    return np.frombuffer(body, dtype=dtype, count=count, offset=buf.tell()).reshape(shape)
+
+
+def decode_windows(body, content_type, count=None):
+    """
+    (N, SEQ_LEN, NUM_FEATURES) windows from a binary body.
+
+    `count` is the number of windows the caller expects (1 for /predict);
+    a single 2-D window is accepted when count is 1.
+    """
+    kind = media_type(content_type)
+    if kind in RAW_TYPES:
+        per_window = SEQ_LEN * NUM_FEATURES * 4
+        if not body or len(body) % per_window:
+            raise ValueError(f"Body must be a multiple of {per_window} bytes "
+                             f"({SEQ_LEN}x{NUM_FEATURES} float32 windows), got {len(body)}")
+        arr = np.frombuffer(body, dtype="<f4").reshape(-1, *WINDOW_SHAPE)
+    elif kind in NPY_TYPES:
+        arr = _npy_view(body)
+        if arr.shape == WINDOW_SHAPE:
+            arr = arr[None]
+        if arr.ndim != 3 or arr.shape[1:] != WINDOW_SHAPE:
+            raise ValueError(f"Expected windows of shape {WINDOW_SHAPE}, got {arr.shape}")
+    else:
+        raise UnsupportedMediaType(f"Unsupported Content-Type: {content_type}")
+
+    if count is not None and arr.shape[0] != count:
+        raise ValueError(f"Expected {count} window(s), got {arr.shape[0]}")
+    return arr